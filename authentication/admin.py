@@ -26,5 +26,6 @@ class CustomUserAdmin(UserAdmin):
 
     search_fields = ('username', 'email', 'worker_id')
     ordering = ('username',)
+    list_select_related = ('created_by',)
 
 admin.site.register(CustomUser, CustomUserAdmin)
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("authentication", "0004_customuser_username"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(fields=["date_joined", "id"], name="user_joined_id"),
+        ),
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(
+                fields=["user_type", "date_joined", "id"], name="user_type_joined_id"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(
+                fields=["created_by", "date_joined", "id"],
+                name="user_creator_joined_id",
+            ),
+        ),
+    ]
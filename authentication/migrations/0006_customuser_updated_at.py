@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("authentication", "0005_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
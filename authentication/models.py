@@ -47,6 +47,7 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     date_joined = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)  # ETags of machine payloads that show the username
 
     # Set worker_id as the primary authentication field when email is missing
     USERNAME_FIELD = "username"  # Used for login
@@ -54,5 +55,13 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
 
     objects = CustomUserManager()
 
+    class Meta:
+        indexes = [
+            # keyset pagination of user lists (llf_backend/pagination.py)
+            models.Index(fields=["date_joined", "id"], name="user_joined_id"),
+            models.Index(fields=["user_type", "date_joined", "id"], name="user_type_joined_id"),
+            models.Index(fields=["created_by", "date_joined", "id"], name="user_creator_joined_id"),
+        ]
+
     def __str__(self):
         return self.email if self.email else self.worker_id
@@ -2,11 +2,14 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.db import IntegrityError
 from rest_framework.exceptions import ValidationError
+from llf_backend.fieldsets import SparseFieldsMixin
 
 CustomUser = get_user_model()
 
 # 1. General User Serializer
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    compact_fields = ('id', 'username', 'worker_id')
+
     class Meta:
         model = CustomUser
         fields = ('id', 'username', 'email', 'user_type', 'worker_id')
@@ -63,8 +66,9 @@ class WorkerRegistrationSerializer(serializers.ModelSerializer):
 
 
 # 4. Worker List (just adding username)
-class WorkerListSerializer(serializers.ModelSerializer):
+class WorkerListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created_by_name = serializers.CharField(source='created_by.username', read_only=True)
+    compact_fields = ('id', 'username', 'worker_id')
 
     class Meta:
         model = CustomUser
@@ -1,3 +1,36 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .models import CustomUser
+
+
+class UserListQueryBudgetTests(TestCase):
+    """User lists run a fixed number of queries however many users exist."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(email="admin@example.com", username="admin", password="x", user_type="admin")
+        cls.engineer = CustomUser.objects.create_user(email="eng@example.com", username="eng", password="x", user_type="engineer")
+        CustomUser.objects.bulk_create([
+            CustomUser(worker_id=f"w{i}", username=f"w{i}", user_type="worker", created_by=cls.engineer)
+            for i in range(100)
+        ])
+
+    def assertBudget(self, user, url, queries):
+        client = APIClient()
+        client.force_authenticate(user)
+        with self.assertNumQueries(queries):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_user_list(self):
+        self.assertBudget(self.admin, "/api/users/", 1)
+        self.assertBudget(self.engineer, "/api/users/?page_size=10", 1)
+
+    def test_engineer_workers_list(self):
+        response = self.assertBudget(self.engineer, "/api/workers/", 1)
+        self.assertEqual(len(response.data), 100)
+        response = self.assertBudget(self.engineer, "/api/workers/?page_size=30", 1)
+        self.assertEqual(len(response.data["results"]), 30)
+        self.assertIsNotNone(response.data["next"])
@@ -3,6 +3,9 @@ from rest_framework import status, generics, permissions
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
+from llf_backend.fastpath import FastRendererMixin, serialize_list
+from llf_backend.fieldsets import only_selected
+from llf_backend.pagination import DateJoinedKeysetPagination
 from .models import CustomUser
 from .serializers import (
     EngineerRegistrationSerializer, 
@@ -71,22 +74,32 @@ class LoginView(APIView):
             })
         return Response('Invalid Email or Password.', status=status.HTTP_400_BAD_REQUEST)
 
-class UserListView(generics.ListAPIView):
+class UserListView(FastRendererMixin, generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated, IsAdmin | IsEngineer]
     serializer_class = UserSerializer
+    pagination_class = DateJoinedKeysetPagination  # opt-in with ?page_size= / ?cursor=
 
     def get_queryset(self):
         if self.request.user.user_type == 'admin':
-            return CustomUser.objects.all()
+            users = CustomUser.objects.all()
         else:
-            return CustomUser.objects.filter(user_type='worker')
+            users = CustomUser.objects.filter(user_type='worker')
+        return only_selected(users, self.serializer_class, self.request)
+
+    def list(self, request, *args, **kwargs):
+        data, paginated = serialize_list(request, self.get_queryset(), self.serializer_class, self.paginator)
+        if paginated:
+            return self.get_paginated_response(data)
+        return Response(data)
 
 class EngineerWorkersListView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated, IsEngineer]
     serializer_class = WorkerListSerializer
+    pagination_class = DateJoinedKeysetPagination  # opt-in with ?page_size= / ?cursor=
 
     def get_queryset(self):
-        return CustomUser.objects.filter(user_type='worker', created_by=self.request.user)
+        workers = CustomUser.objects.filter(user_type='worker', created_by=self.request.user).select_related('created_by')
+        return only_selected(workers, self.serializer_class, self.request)
 
 class LogoutView(APIView):
     permission_classes = [permissions.IsAuthenticated]
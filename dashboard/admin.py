@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Machine, InspectionReport, Escalation, PendingInspection  # Import the Machine model
+from .models import Machine, InspectionReport, Escalation, PendingInspection, CommandCheckpoint, CheckPendingJob, SchedulerLock, DueOccurrence, ComplianceRollup, Tombstone, IdempotencyKey  # Import the Machine model
 from django.utils.html import format_html
 from django import forms
 from authentication.models import CustomUser  # for fetching worker by ID
@@ -25,6 +25,7 @@ class MachineAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'engineer', 'worker', 'status', 'inspection_frequency', 'location', 'created_at')  
     search_fields = ('name', 'engineer__username', 'worker__username', 'location')  
     list_filter = ('status', 'inspection_frequency')  
+    list_select_related = ('engineer', 'worker')
 
 
 
@@ -87,6 +88,7 @@ class InspectionReportAdmin(admin.ModelAdmin):
         'sound',
     )
     ordering = ('-timestamp',)
+    list_select_related = ('machine', 'worker')
 
     def view_report(self, obj):
         return format_html(
@@ -109,7 +111,7 @@ class InspectionReportChoiceField(forms.ModelChoiceField):
 
 class EscalationAdminForm(forms.ModelForm):
     report = InspectionReportChoiceField(
-        queryset=InspectionReport.objects.all(),
+        queryset=InspectionReport.objects.select_related('machine', 'worker'),  # used by every label
         required=False
     )
 
@@ -131,6 +133,7 @@ class EscalationAdmin(admin.ModelAdmin):
     search_fields = ('machine__name', 'worker__username', 'engineer__username', 'status')
     list_filter = ('status', 'created_at')
     ordering = ('-created_at',)
+    list_select_related = ('machine', 'worker', 'engineer', 'report__machine', 'report__worker')
 
     # Custom method to mark the escalation as resolved directly from the list view
     def mark_as_resolved(self, request, queryset):
@@ -149,3 +152,60 @@ class PendingInspectionAdmin(admin.ModelAdmin):
     list_filter = ('resolved', 'date_due', 'machine')
     search_fields = ('machine__name',)  # assuming Machine has a 'name' field
     ordering = ('-date_due',)
+    list_select_related = ('machine',)
+
+
+
+@admin.register(CommandCheckpoint)
+class CommandCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'last_date', 'updated_at')
+
+
+
+@admin.register(CheckPendingJob)
+class CheckPendingJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'requested_by', 'days_done', 'days_total', 'pendings_created', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    ordering = ('-created_at',)
+    list_select_related = ('requested_by',)
+
+
+
+@admin.register(SchedulerLock)
+class SchedulerLockAdmin(admin.ModelAdmin):
+    list_display = ('name', 'owner', 'locked_until', 'last_run_at', 'last_error')
+
+
+
+@admin.register(DueOccurrence)
+class DueOccurrenceAdmin(admin.ModelAdmin):
+    list_display = ('machine', 'due_date', 'status', 'updated_at')
+    list_filter = ('status', 'due_date')
+    list_select_related = ('machine',)
+    ordering = ('-due_date',)
+
+
+
+@admin.register(ComplianceRollup)
+class ComplianceRollupAdmin(admin.ModelAdmin):
+    list_display = ('date', 'engineer', 'location', 'frequency', 'due', 'completed', 'pending', 'missed', 'escalated')
+    list_filter = ('frequency', 'date')
+    list_select_related = ('engineer',)
+    ordering = ('-date',)
+
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'object_id', 'reason', 'engineer_id', 'worker_id', 'created_at')
+    list_filter = ('kind', 'reason')
+    ordering = ('-created_at',)
+
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('user', 'key', 'status_code', 'created_at')
+    list_select_related = ('user',)
+    search_fields = ('key',)
+    ordering = ('-created_at',)
@@ -0,0 +1,102 @@
+"""
+Idempotency-Key support for POST endpoints (``@idempotent``).
+
+The first request carrying a key claims it by inserting an IdempotencyKey
+row; the unique (user, key) constraint settles races. Its response is stored
+and replayed, with ``Idempotent-Replayed: true``, to every retry with the same
+key and body for IDEMPOTENCY_KEY_HOURS. A retry while the first request is
+still running gets 409, the same key with a different body 422. 5xx
+responses aren't stored, so those can be retried. A key left unanswered for
+IDEMPOTENCY_IN_FLIGHT_SECONDS, because the process handling it died, is
+taken over by the next retry like an expired one.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+
+
+def fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+
+def _claim(user, key, digest):
+    """The new IdempotencyKey row, or None if the key is already taken."""
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(user=user, key=key, fingerprint=digest)
+    except IntegrityError:
+        return None
+
+
+def _reclaimable(record):
+    """Expired, or never answered because the request handling it died."""
+    current = now()
+    if record.created_at < current - timedelta(hours=settings.IDEMPOTENCY_KEY_HOURS):
+        return True
+    return record.status_code is None and record.created_at < current - timedelta(seconds=settings.IDEMPOTENCY_IN_FLIGHT_SECONDS)
+
+
+def _replay(record, digest):
+    if record.fingerprint != digest:
+        return Response(
+            {"error": f"{HEADER} was already used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    if record.status_code is None:
+        return Response(
+            {"error": f"A request with this {HEADER} is still being processed."},
+            status=status.HTTP_409_CONFLICT,
+        )
+    response = Response(record.response, status=record.status_code)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(handler):
+    """Decorator for an APIView method; requests without the header pass straight through."""
+    @wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return handler(view, request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+            return Response({"error": f"{HEADER} is too long."}, status=status.HTTP_400_BAD_REQUEST)
+
+        digest = fingerprint(request)
+        record = _claim(request.user, key, digest)
+        if record is None:
+            existing = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+            if existing is not None and not _reclaimable(existing):
+                return _replay(existing, digest)
+            if existing is not None:
+                # By pk: a concurrent retry may already have replaced it with its own claim
+                IdempotencyKey.objects.filter(pk=existing.pk).delete()
+            record = _claim(request.user, key, digest)
+            if record is None:  # lost the race for the freed key
+                return _replay(IdempotencyKey.objects.get(user=request.user, key=key), digest)
+
+        # By pk with update()/delete(), which don't fail if a retry took the key over meanwhile
+        claimed = IdempotencyKey.objects.filter(pk=record.pk)
+        try:
+            response = handler(view, request, *args, **kwargs)
+        except Exception:
+            claimed.delete()
+            raise
+        if response.status_code >= 500:
+            claimed.delete()
+        else:
+            claimed.update(status_code=response.status_code, response=response.data)
+        return response
+    return wrapper
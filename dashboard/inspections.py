@@ -0,0 +1,119 @@
+"""
+Batch inspection submission (InspectionBatchView).
+
+Devices that inspected offline send all their results at once. Each entry is
+validated on its own, but machine existence, assignment and "already
+reported" are answered for the whole batch with one query each, and the
+accepted reports are written together: one bulk INSERT, one UPDATE resolving
+their open pendings, one bulk UPDATE of the machines' due columns and one
+UPDATE per distinct due date on DueOccurrence, all in one transaction.
+
+bulk_create / update() skip the model signals, so the dashboard-summary
+cache is invalidated here after commit.
+"""
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.timezone import now
+
+from .models import DueOccurrence, InspectionReport, Machine, PendingInspection
+from .serializers import BatchInspectionItemSerializer, InspectionReportSerializer
+from .summary_cache import invalidate_users
+
+MAX_BATCH = 200
+
+
+def _failed(index, error):
+    return {"index": index, "status": "failed", "error": error}
+
+
+def submit_batch(worker, items, retry=True):
+    """Create the valid reports among ``items``; returns one result per item, in order."""
+    results = [None] * len(items)
+    accepted = {}  # index -> validated data
+    for index, item in enumerate(items):
+        serializer = BatchInspectionItemSerializer(data=item)
+        if serializer.is_valid():
+            accepted[index] = serializer.validated_data
+        else:
+            results[index] = _failed(index, serializer.errors)
+
+    machine_ids = {data["machine"] for data in accepted.values()}
+    assigned_to, engineer_of = {}, {}
+    for machine_id, worker_id, engineer_id in Machine.objects.filter(id__in=machine_ids).values_list("id", "worker_id", "engineer_id"):
+        assigned_to[machine_id] = worker_id
+        engineer_of[machine_id] = engineer_id
+    reported = set(
+        InspectionReport.objects.filter(
+            machine_id__in=machine_ids,
+            due_date__in={data["due_date"] for data in accepted.values()},
+        ).values_list("machine_id", "due_date")
+    )
+
+    reports = {}  # index -> unsaved InspectionReport
+    first_seen = {}
+    for index, data in accepted.items():
+        key = (data["machine"], data["due_date"])
+        if data["machine"] not in assigned_to:
+            results[index] = _failed(index, "Machine not found.")
+        elif assigned_to[data["machine"]] != worker.id:
+            results[index] = _failed(index, "You are not assigned to this machine.")
+        elif key in reported:
+            results[index] = _failed(index, "Inspection already done.")
+        elif key in first_seen:
+            results[index] = _failed(index, f"Duplicate of item {first_seen[key]} in this batch.")
+        else:
+            first_seen[key] = index
+            reports[index] = InspectionReport(
+                machine_id=data["machine"],
+                worker=worker,
+                due_date=data["due_date"],
+                look=data["look"],
+                feel=data["feel"],
+                sound=data["sound"],
+                look_comment=data.get("look_comment"),
+                feel_comment=data.get("feel_comment"),
+                sound_comment=data.get("sound_comment"),
+                is_escalated=not (data["look"] and data["feel"] and data["sound"]),
+            )
+
+    if reports:
+        try:
+            _save(list(reports.values()), set(first_seen))
+        except IntegrityError:
+            if not retry:
+                raise
+            # A concurrent submission inserted one of these (machine, due_date) after
+            # the check; nothing was written, and the second pass reports it as done.
+            return submit_batch(worker, items, retry=False)
+        users = {worker.id, *(engineer_of[machine_id] for machine_id, _ in first_seen)}
+        transaction.on_commit(lambda: invalidate_users(users))
+
+    for index, report in reports.items():
+        results[index] = {"index": index, "status": "created", "report": InspectionReportSerializer(report).data}
+    return results
+
+
+@transaction.atomic
+def _save(reports, keys):
+    InspectionReport.objects.bulk_create(reports)
+    written_at = now()
+
+    PendingInspection.objects.filter(
+        reduce(or_, (Q(machine_id=machine_id, date_due=due_date) for machine_id, due_date in keys)),
+        resolved=False,
+    ).update(resolved=True, updated_at=written_at)
+
+    latest = {}
+    for report in reports:
+        if report.machine_id not in latest or report.timestamp > latest[report.machine_id]:
+            latest[report.machine_id] = report.timestamp
+    machines = list(Machine.objects.select_for_update().filter(id__in=latest).order_by("id"))
+    for machine in machines:
+        machine.note_inspection(latest[machine.id])
+        machine.updated_at = written_at
+    Machine.objects.bulk_update(machines, ["last_inspected_at", "next_due_date", "updated_at"])
+
+    DueOccurrence.objects.mark(keys, DueOccurrence.Status.COMPLETED)
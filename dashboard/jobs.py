@@ -0,0 +1,153 @@
+"""
+In-process runner for check_pending jobs queued from the API.
+
+Runs execute on a small thread pool inside the web process. Job state lives
+in the CheckPendingJob table, so any gunicorn worker can answer a status
+request, not just the one that owns the thread.
+
+While a job runs, each processed day bumps its counters and updated_at;
+the per-day lines are kept in memory and written once with the result. A
+job whose process died stops moving: ``fail_stale_jobs`` marks queued or
+running jobs untouched for CHECK_PENDING_JOB_STALE_MINUTES as failed, and
+the status endpoint calls it before reading.
+
+``stream_check_pending`` is the synchronous alternative: it yields one NDJSON
+line per processed day while the command runs on a helper thread.
+"""
+import json
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils.timezone import now
+
+from .models import CheckPendingJob
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "CHECK_PENDING_JOB_THREADS", 1),
+    thread_name_prefix="check-pending",
+)
+
+
+def submit_check_pending(options, user=None):
+    """Create a queued job and hand it to the pool once the row is committed."""
+    job = CheckPendingJob.objects.create(options=options, requested_by=user)
+    transaction.on_commit(lambda: _executor.submit(run_check_pending_job, job.id))
+    return job
+
+
+def fail_stale_jobs():
+    """Mark queued / running jobs that stopped making progress as failed; returns how many."""
+    current = now()
+    cutoff = current - timedelta(minutes=settings.CHECK_PENDING_JOB_STALE_MINUTES)
+    return CheckPendingJob.objects.filter(
+        status__in=[CheckPendingJob.Status.QUEUED, CheckPendingJob.Status.RUNNING],
+        updated_at__lt=cutoff,
+    ).update(
+        status=CheckPendingJob.Status.FAILED,
+        error="The job stopped making progress; its process probably exited.",
+        finished_at=current,
+        updated_at=current,
+    )
+
+
+def run_check_pending_job(job_id):
+    close_old_connections()
+    try:
+        CheckPendingJob.objects.filter(id=job_id).update(
+            status=CheckPendingJob.Status.RUNNING, started_at=now(), updated_at=now()
+        )
+        job = CheckPendingJob.objects.get(id=job_id)
+        # Only a job still marked running is ours to update; a stale one was failed meanwhile
+        running = CheckPendingJob.objects.filter(id=job_id, status=CheckPendingJob.Status.RUNNING)
+        out = StringIO()
+        err = StringIO()
+        lines = []
+
+        def progress(event):
+            lines.append(event["message"] + "\n")
+            running.update(
+                days_done=event["days_done"],
+                days_total=event["days_total"],
+                pendings_created=F("pendings_created") + event["new_pendings"],
+                updated_at=now(),
+            )
+
+        try:
+            call_command("check_pending", stdout=out, stderr=err, simple=True, progress=progress, **job.options)
+        except Exception as e:
+            logger.exception("check_pending job %s failed", job_id)
+            running.update(
+                status=CheckPendingJob.Status.FAILED,
+                output="".join(lines),
+                error=str(e),
+                result={"success": False, "error": str(e), "details": err.getvalue()},
+                finished_at=now(),
+                updated_at=now(),
+            )
+            return
+
+        # The command reports bad arguments on stderr rather than raising
+        failed = bool(err.getvalue())
+        running.update(
+            status=CheckPendingJob.Status.FAILED if failed else CheckPendingJob.Status.SUCCEEDED,
+            output="".join(lines) + out.getvalue(),
+            error=err.getvalue(),
+            result={"success": not failed, "output": out.getvalue()},
+            finished_at=now(),
+            updated_at=now(),
+        )
+    finally:
+        # Pool threads keep their own connection; don't leak it between jobs
+        connection.close()
+
+
+def stream_check_pending(options):
+    """
+    Run check_pending on a helper thread and yield one JSON line per day as it
+    is processed, then a final ``{"done": true, ...}`` line. The queue is
+    bounded, so a slow client throttles the run instead of growing memory.
+    """
+    events = queue.Queue(maxsize=64)
+    disconnected = threading.Event()
+
+    def put(event):
+        # Once the client has gone away, keep running but stop queueing
+        while not disconnected.is_set():
+            try:
+                events.put(event, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    def run():
+        out = StringIO()
+        err = StringIO()
+        try:
+            call_command("check_pending", stdout=out, stderr=err, simple=True, progress=put, **options)
+            error = err.getvalue()
+            put({"done": True, "success": not error, "output": out.getvalue(), "error": error})
+        except Exception as e:
+            logger.exception("streamed check_pending failed")
+            put({"done": True, "success": False, "error": str(e), "details": err.getvalue()})
+        finally:
+            connection.close()
+
+    threading.Thread(target=run, name="check-pending-stream", daemon=True).start()
+    try:
+        while True:
+            event = events.get()
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+            if event.get("done"):
+                break
+    finally:
+        disconnected.set()
@@ -0,0 +1,108 @@
+"""
+Inspection latency and worker throughput, computed column-wise with NumPy.
+
+Latency is ``timestamp - start of due_date`` (local time) in hours: a report
+filed during its due date has a latency between 0 and 24, a late one more,
+an early one a negative value.
+"""
+import warnings
+from datetime import datetime
+
+import numpy as np
+from django.utils import timezone
+
+PERCENTILES = (50, 90, 99)
+
+
+def group_percentiles(keys, values, percentiles=PERCENTILES):
+    """
+    Percentiles of ``values`` per distinct key, with np.percentile's linear
+    interpolation. Returns ``(unique_keys, counts, table)`` where table has
+    one column per percentile.
+    """
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    if not unique_keys.size:
+        return unique_keys, np.empty(0, dtype=np.int64), np.empty((0, len(percentiles)))
+    order = np.lexsort((values, inverse))
+    sorted_values = values[order]
+    counts = np.bincount(inverse, minlength=unique_keys.size)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    table = np.empty((unique_keys.size, len(percentiles)))
+    for column, p in enumerate(percentiles):
+        position = (counts - 1) * (p / 100.0)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        low_values = sorted_values[starts + low]
+        table[:, column] = low_values + (sorted_values[starts + high] - low_values) * (position - low)
+    return unique_keys, counts, table
+
+
+def _utc_seconds(timestamps):
+    # Django hands back aware UTC datetimes; numpy keeps their wall time
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        return np.array(timestamps, dtype="datetime64[s]").astype(np.int64)
+
+
+def _due_start_seconds(due_dates):
+    """UTC epoch seconds of local midnight of each due date (one tz lookup per distinct date)."""
+    unique_dates, inverse = np.unique(np.array(due_dates, dtype="datetime64[D]"), return_inverse=True)
+    tz = timezone.get_current_timezone()
+    starts = np.array([
+        timezone.make_aware(datetime.combine(day, datetime.min.time()), tz).timestamp()
+        for day in unique_dates.astype(object)
+    ], dtype=np.int64)
+    return starts[inverse]
+
+
+def _summaries(keys, latency):
+    unique_keys, counts, table = group_percentiles(keys, latency)
+    return [
+        {
+            "key": key,
+            "count": int(count),
+            **{f"p{p}": round(float(value), 2) for p, value in zip(PERCENTILES, row)},
+        }
+        for key, count, row in zip(unique_keys.tolist(), counts.tolist(), table)
+    ]
+
+
+def latency_report(reports):
+    """
+    Latency percentiles overall and per worker, machine and location, plus a
+    workers x days matrix of inspection counts, for a queryset of reports.
+    """
+    rows = list(reports.values_list(
+        "timestamp", "due_date", "timestamp__date", "worker_id", "machine_id", "machine__location",
+    ))
+    if not rows:
+        return {"count": 0, "overall": None, "by_worker": [], "by_machine": [], "by_location": [],
+                "throughput": {"dates": [], "workers": [], "counts": []}}
+    timestamps, due_dates, report_dates, workers, machines, locations = zip(*rows)
+
+    latency = (_utc_seconds(timestamps) - _due_start_seconds(due_dates)) / 3600.0
+    workers = np.array(workers, dtype=np.int64)
+    machines = np.array(machines, dtype=np.int64)
+    locations = np.array(locations, dtype=object).astype(str)
+
+    _, _, overall = group_percentiles(np.zeros(latency.size, dtype=np.int64), latency)
+
+    # Throughput: reports per worker per local day
+    days, day_index = np.unique(np.array(report_dates, dtype="datetime64[D]"), return_inverse=True)
+    worker_ids, worker_index = np.unique(workers, return_inverse=True)
+    counts = np.zeros((worker_ids.size, days.size), dtype=np.int64)
+    np.add.at(counts, (worker_index, day_index), 1)
+
+    return {
+        "count": int(latency.size),
+        "overall": {f"p{p}": round(float(value), 2) for p, value in zip(PERCENTILES, overall[0])},
+        "by_worker": _summaries(workers, latency),
+        "by_machine": _summaries(machines, latency),
+        "by_location": _summaries(locations, latency),
+        "throughput": {
+            "dates": [str(day) for day in days],
+            "workers": worker_ids.tolist(),
+            "counts": counts.tolist(),
+        },
+    }
@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from authentication.models import CustomUser
+from dashboard.models import Machine
+from dashboard.serializers import MachineSerializer
+from llf_backend.fastpath import ValuesRows
+from llf_backend.renderers import FastJSONRenderer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the machine list serialized through MachineSerializer + JSONRenderer against "
+        "ValuesRows + FastJSONRenderer, on throwaway rows that are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Machines to serialize (default 10000)')
+        parser.add_argument('--repeat', type=int, default=3, help='Best of N runs (default 3)')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['rows'], max(1, options['repeat']))
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def run(self, count, repeat):
+        engineer = CustomUser.objects.create_user(
+            email='benchmark@example.com', username='benchmark-engineer', password=None, user_type='engineer'
+        )
+        worker = CustomUser.objects.create_user(
+            worker_id='benchmark-worker', username='benchmark-worker', password=None, user_type='worker',
+            created_by=engineer,
+        )
+        frequencies = [choice for choice, _ in Machine.InspectionFrequency.choices]
+        Machine.objects.bulk_create(
+            [
+                Machine(
+                    name=f"Benchmark machine {i}", engineer=engineer, worker=worker if i % 2 else None,
+                    inspection_frequency=frequencies[i % len(frequencies)], location=f"Bay {i % 20}",
+                )
+                for i in range(count)
+            ],
+            batch_size=1000,
+        )
+        queryset = Machine.objects.filter(engineer=engineer).select_related("engineer", "worker").order_by("id")
+
+        def serializer_path():
+            return JSONRenderer().render(MachineSerializer(queryset.all(), many=True).data)
+
+        def values_path():
+            rows = ValuesRows(MachineSerializer)
+            return FastJSONRenderer().render(rows.to_representation(rows.values(queryset.all())))
+
+        timings = {}
+        output = {}
+        for label, path in (("serializer", serializer_path), ("values", values_path)):
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                output[label] = path()
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[label] = best
+            self.stdout.write(f"{label:>10}: {best * 1000:.1f} ms for {count} rows ({len(output[label])} bytes)")
+
+        if output["serializer"] != output["values"]:
+            self.stderr.write("❌ The two paths rendered different bytes.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Identical output; values path is {timings['serializer'] / timings['values']:.1f}x faster."
+        ))
@@ -1,14 +1,19 @@
 from django.core.management.base import BaseCommand
 from django.utils.timezone import now
 from datetime import timedelta
-from calendar import monthrange
 from datetime import datetime
 
-from dashboard.models import Machine, InspectionReport, PendingInspection
+from dashboard.models import CommandCheckpoint, Machine
+from dashboard.pending import DEFAULT_BATCH_SIZE, detect_pending, detect_pending_parallel
+from dashboard.recurrence import is_due_on, machine_anchor, machine_rule
+
+CHECKPOINT_NAME = "check_pending"
 
 
 class Command(BaseCommand):
     help = "Check machines that were due for inspection on past days and mark as pending if missed."
+    # progress: optional callable (call_command only) receiving one dict per processed day
+    stealth_options = ("progress",)
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -32,14 +37,47 @@ class Command(BaseCommand):
             action='store_true',
             help='Print plain output without ANSI styling'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Maximum (machine, due date) pairs processed in memory at once (default {DEFAULT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Split machines into id-range shards and process them in this many worker processes'
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Resume from the day after the saved checkpoint up to yesterday (--days sets the first run and the re-check window)'
+        )
 
     def handle(self, *args, **options):
         start = options.get('start')
         end = options.get('end')
         simple = options.get('simple', False)
-        today = now().date()
-
-        if start and end:
+        incremental = options.get('incremental', False)
+        started_at = now()
+        today = started_at.date()
+        checkpoint = None
+
+        if incremental:
+            if start or end:
+                self.stderr.write("❌ --incremental can't be combined with --start/--end.")
+                return
+            checkpoint = CommandCheckpoint.objects.filter(name=CHECKPOINT_NAME).first()
+            end_date = today - timedelta(days=1)
+            if checkpoint:
+                start_date = checkpoint.last_date + timedelta(days=1)
+            elif options.get('days') is not None:
+                start_date = today - timedelta(days=options['days'])
+            else:
+                self.stderr.write("❌ No checkpoint yet. Provide --days for the first --incremental run.")
+                return
+        elif start and end:
             try:
                 start_date = datetime.strptime(start, '%Y-%m-%d').date()
                 end_date = datetime.strptime(end, '%Y-%m-%d').date()
@@ -57,38 +95,40 @@ class Command(BaseCommand):
             self.stderr.write("❌ Provide either --days or both --start and --end.")
             return
 
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            self.stderr.write("❌ --batch-size and --workers must be positive integers.")
+            return
+
+        if checkpoint:
+            self._recheck_changed_machines(checkpoint, options, simple, today)
+            if start_date > end_date:
+                self._save_checkpoint(checkpoint.last_date, started_at)
+                self._print(f"✅ Already up to date through {checkpoint.last_date.strftime('%a - %d - %B - %Y')}.", simple)
+                return
+
+        if options['workers'] > 1:
+            results = detect_pending_parallel(start_date, end_date, options['workers'], batch_size=options['batch_size'])
+        else:
+            results = detect_pending(start_date, end_date, batch_size=options['batch_size'])
+
         total_new_pendings = 0
-        machines = Machine.objects.all()
-
-        for delta in range((end_date - start_date).days + 1):
-            check_date = start_date + timedelta(days=delta)
-            new_pendings = 0
-            for machine in machines:
-                if not self.was_due_on(machine, check_date):
-                    continue
-
-                inspected = InspectionReport.objects.filter(
-                    machine=machine,
-                    due_date=check_date
-                ).exists()
-
-                if not inspected:
-                    already_pending = PendingInspection.objects.filter(
-                        machine=machine,
-                        date_due=check_date,
-                        resolved=False
-                    ).exists()
-
-                    if not already_pending:
-                        PendingInspection.objects.create(
-                            machine=machine,
-                            date_due=check_date,
-                        )
-                        new_pendings += 1
+        days_total = (end_date - start_date).days + 1
+        progress = options.get('progress')
 
+        for days_done, (check_date, new_pendings) in enumerate(results, start=1):
             total_new_pendings += new_pendings
             message = f"✅ {new_pendings} new pending inspections recorded for {check_date.strftime('%a - %d - %B - %Y')}."
             self._print(message, simple)
+            if progress:
+                progress({
+                    "date": check_date.isoformat(),
+                    "new_pendings": new_pendings,
+                    "days_done": days_done,
+                    "days_total": days_total,
+                    "message": message,
+                })
+            if incremental:
+                self._save_checkpoint(check_date, started_at)
 
         final_message = (
             f"🎯 Total new pending inspections recorded from {start_date.strftime('%a - %d - %B - %Y')} to "
@@ -103,14 +143,37 @@ class Command(BaseCommand):
         else:
             self.stdout.write(self.style.SUCCESS(message))
 
+    def _save_checkpoint(self, last_date, started_at):
+        CommandCheckpoint.objects.update_or_create(
+            name=CHECKPOINT_NAME,
+            defaults={"last_date": last_date, "updated_at": started_at},
+        )
+
+    def _recheck_changed_machines(self, checkpoint, options, simple, today):
+        """
+        Re-evaluate, up to the checkpoint, only the machines whose frequency or
+        creation date changed after the checkpoint was written. The window
+        starts at today - --days, or at the earliest creation date among them.
+        """
+        changed = Machine.objects.filter(schedule_changed_at__gt=checkpoint.updated_at)
+        created_dates = list(changed.values_list('created_at__date', flat=True))
+        if not created_dates:
+            return
+
+        if options.get('days') is not None:
+            recheck_start = today - timedelta(days=options['days'])
+        else:
+            recheck_start = min(created_dates)
+
+        new_pendings = sum(
+            count for _, count in detect_pending(
+                recheck_start, checkpoint.last_date, machines=changed, batch_size=options['batch_size']
+            )
+        )
+        self._print(
+            f"🔁 {new_pendings} new pending inspections recorded for {len(created_dates)} machines with changed schedules.",
+            simple,
+        )
+
     def was_due_on(self, machine, target_date):
-        freq = machine.inspection_frequency
-
-        if freq == 'daily':
-            return True
-        elif freq == 'weekly':
-            return target_date.weekday() == 5  # Saturday
-        elif freq == 'monthly':
-            last_day = monthrange(target_date.year, target_date.month)[1]
-            return target_date.day == last_day
-        return False
+        return is_due_on(machine_rule(machine), target_date, machine_anchor(machine))
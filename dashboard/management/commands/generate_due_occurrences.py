@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils.timezone import localdate, now
+
+from dashboard.models import CommandCheckpoint, DueOccurrence, Machine
+from dashboard.occurrences import CHECKPOINT_NAME, DEFAULT_BATCH_SIZE, generate_occurrences
+
+
+class Command(BaseCommand):
+    help = "Keep the DueOccurrence table filled from each machine's creation up to a rolling horizon."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizon',
+            type=int,
+            default=60,
+            help='Days ahead of today to generate (default 60)'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Regenerate every machine from its creation date instead of continuing from the checkpoint'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Machines per chunk (default {DEFAULT_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        started_at = now()
+        today = localdate()
+        horizon_end = today + timedelta(days=options['horizon'])
+        batch_size = max(1, options['batch_size'])
+        checkpoint = CommandCheckpoint.objects.filter(name=CHECKPOINT_NAME).first()
+
+        if checkpoint is None or options['full']:
+            written = generate_occurrences(Machine.objects.all(), None, horizon_end, batch_size)
+        else:
+            # New or rescheduled machines: drop their future rows and rebuild their whole calendar
+            changed = Machine.objects.filter(
+                Q(created_at__gt=checkpoint.updated_at) | Q(schedule_changed_at__gt=checkpoint.updated_at)
+            )
+            DueOccurrence.objects.filter(
+                machine__in=changed, due_date__gte=today, status=DueOccurrence.Status.SCHEDULED
+            ).delete()
+            written = generate_occurrences(changed, None, horizon_end, batch_size)
+
+            # Everyone else: just roll the horizon forward
+            if checkpoint.last_date < horizon_end:
+                written += generate_occurrences(
+                    Machine.objects.exclude(id__in=changed),
+                    checkpoint.last_date + timedelta(days=1),
+                    horizon_end,
+                    batch_size,
+                )
+
+        # Due dates that passed with neither a report nor a pending inspection
+        missed = DueOccurrence.objects.filter(
+            status=DueOccurrence.Status.SCHEDULED, due_date__lt=today
+        ).update(status=DueOccurrence.Status.MISSED)
+
+        CommandCheckpoint.objects.update_or_create(
+            name=CHECKPOINT_NAME,
+            defaults={"last_date": horizon_end, "updated_at": started_at},
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {written} due occurrences written up to {horizon_end}, {missed} marked missed."
+        ))
@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from dashboard.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses older than IDEMPOTENCY_KEY_HOURS."
+
+    def handle(self, *args, **options):
+        cutoff = now() - timedelta(hours=settings.IDEMPOTENCY_KEY_HOURS)
+        deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"✅ Pruned {deleted} idempotency keys older than {settings.IDEMPOTENCY_KEY_HOURS} hours."))
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from dashboard.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones older than SYNC_TOMBSTONE_DAYS; older sync tokens get a full sync instead."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.SYNC_TOMBSTONE_DAYS,
+            help=f'Keep this many days of tombstones (default {settings.SYNC_TOMBSTONE_DAYS})'
+        )
+
+    def handle(self, *args, **options):
+        # Keep at least as long as tokens are honoured, or deletes would be missed
+        days = max(options['days'], settings.SYNC_TOMBSTONE_DAYS)
+        deleted, _ = Tombstone.objects.filter(created_at__lt=now() - timedelta(days=days)).delete()
+        self.stdout.write(self.style.SUCCESS(f"✅ Pruned {deleted} tombstones older than {days} days."))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils.timezone import now
+
+from dashboard.models import Machine, InspectionReport
+
+
+class Command(BaseCommand):
+    help = "Recompute Machine.last_inspected_at and Machine.next_due_date from the inspection reports."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Machines updated per UPDATE batch'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        latest = dict(
+            InspectionReport.objects.values('machine_id')
+            .annotate(last=Max('timestamp'))
+            .values_list('machine_id', 'last')
+        )
+
+        updated = 0
+        batch = []
+        started_at = now()
+        for machine in Machine.objects.order_by('id').iterator(chunk_size=batch_size):
+            before = (machine.last_inspected_at, machine.next_due_date)
+            machine.last_inspected_at = latest.get(machine.id)
+            machine.refresh_due_columns()
+            if (machine.last_inspected_at, machine.next_due_date) == before:
+                continue  # leave updated_at (and the machine's ETag) alone
+            machine.updated_at = started_at
+            batch.append(machine)
+            if len(batch) >= batch_size:
+                updated += Machine.objects.bulk_update(batch, ['last_inspected_at', 'next_due_date', 'updated_at'])
+                batch = []
+        if batch:
+            updated += Machine.objects.bulk_update(batch, ['last_inspected_at', 'next_due_date', 'updated_at'])
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt due columns; {updated} machines changed."))
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils.timezone import localdate, now
+
+from dashboard.compliance import rollup
+from dashboard.models import CommandCheckpoint, DueOccurrence
+
+CHECKPOINT_NAME = "compliance_rollup"
+
+
+class Command(BaseCommand):
+    help = "Fill ComplianceRollup from DueOccurrence up to yesterday, continuing from the last run."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lookback',
+            type=int,
+            default=7,
+            help='Days before the checkpoint to recompute, for reports and pendings that arrive late (default 7)'
+        )
+        parser.add_argument(
+            '--start',
+            type=str,
+            help='Recompute from this date (YYYY-MM-DD) instead of the checkpoint'
+        )
+
+    def handle(self, *args, **options):
+        started_at = now()
+        end_date = localdate() - timedelta(days=1)
+        checkpoint = CommandCheckpoint.objects.filter(name=CHECKPOINT_NAME).first()
+
+        if options.get('start'):
+            try:
+                start_date = datetime.strptime(options['start'], '%Y-%m-%d').date()
+            except ValueError:
+                self.stderr.write("❌ Invalid date format. Use YYYY-MM-DD.")
+                return
+        elif checkpoint:
+            start_date = checkpoint.last_date + timedelta(days=1) - timedelta(days=max(0, options['lookback']))
+        else:
+            first = DueOccurrence.objects.order_by('due_date').values_list('due_date', flat=True).first()
+            if first is None:
+                self.stdout.write("Nothing to roll up yet; run generate_due_occurrences first.")
+                return
+            start_date = first
+
+        if start_date > end_date:
+            self.stdout.write(self.style.SUCCESS(f"✅ Already up to date through {end_date}."))
+            return
+
+        # One month per transaction keeps the delete/insert windows short
+        rows = 0
+        window_start = start_date
+        while window_start <= end_date:
+            window_end = min(window_start + timedelta(days=30), end_date)
+            rows += rollup(window_start, window_end)
+            window_start = window_end + timedelta(days=1)
+
+        CommandCheckpoint.objects.update_or_create(
+            name=CHECKPOINT_NAME,
+            defaults={"last_date": end_date, "updated_at": started_at},
+        )
+        self.stdout.write(self.style.SUCCESS(f"✅ {rows} rollup rows written from {start_date} to {end_date}."))
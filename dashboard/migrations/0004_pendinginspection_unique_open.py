@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:22
+
+from django.db import migrations, models
+
+
+def drop_duplicate_open_pendings(apps, schema_editor):
+    """Keep the oldest open pending per (machine, date_due) so the constraint can be added."""
+    PendingInspection = apps.get_model("dashboard", "PendingInspection")
+    duplicates = (
+        PendingInspection.objects.filter(resolved=False)
+        .values("machine_id", "date_due")
+        .annotate(keep_id=models.Min("id"), rows=models.Count("id"))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        PendingInspection.objects.filter(
+            machine_id=row["machine_id"],
+            date_due=row["date_due"],
+            resolved=False,
+        ).exclude(id=row["keep_id"]).delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0003_inspectionreport_feel_comment_and_more"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_open_pendings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="pendinginspection",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("resolved", False)),
+                fields=("machine", "date_due"),
+                name="unique_open_pending_inspection",
+            ),
+        ),
+    ]
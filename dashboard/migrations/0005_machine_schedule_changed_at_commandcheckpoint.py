@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:23
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0004_pendinginspection_unique_open"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CommandCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("last_date", models.DateField()),
+                ("updated_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="machine",
+            name="schedule_changed_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
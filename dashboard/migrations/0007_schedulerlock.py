@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0006_checkpendingjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SchedulerLock",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("owner", models.CharField(blank=True, default="", max_length=255)),
+                ("locked_until", models.DateTimeField()),
+                ("last_run_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True, default="")),
+            ],
+        ),
+    ]
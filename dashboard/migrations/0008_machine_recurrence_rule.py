@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:27
+
+import dashboard.recurrence
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0007_schedulerlock"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="machine",
+            name="recurrence_rule",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="e.g. FREQ=DAILY;INTERVAL=3, FREQ=WEEKLY;BYDAY=MO,TH or FREQ=MONTHLY;BYMONTHDAY=15",
+                max_length=255,
+                validators=[dashboard.recurrence.validate_rule],
+            ),
+        ),
+    ]
@@ -0,0 +1,128 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:28
+
+from calendar import monthrange
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copy of the dashboard.recurrence rules as of this migration, so later
+# changes to that module don't change what the backfill computes.
+FREQUENCY_RULES = {
+    "daily": "FREQ=DAILY",
+    "weekly": "FREQ=WEEKLY;BYDAY=SA",
+    "monthly": "FREQ=MONTHLY;BYMONTHDAY=-1",
+}
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+CALENDAR_CYCLE_DAYS = 146097  # the Gregorian calendar repeats every 400 years
+
+
+def rule_for(frequency, recurrence_rule):
+    """``(freq, interval, byday, bymonthday)``; rules were validated on save."""
+    parts = dict(
+        part.strip().partition("=")[::2]
+        for part in (recurrence_rule or FREQUENCY_RULES[frequency]).upper().split(";")
+        if part.strip()
+    )
+    freq = parts["FREQ"]
+    byday = {WEEKDAYS.index(name) for name in parts["BYDAY"].split(",")} if "BYDAY" in parts else set()
+    bymonthday = {int(d) for d in parts["BYMONTHDAY"].split(",")} if "BYMONTHDAY" in parts else set()
+    if freq == "WEEKLY" and not byday:
+        byday = {WEEKDAYS.index("SA")}
+    if freq == "MONTHLY" and not bymonthday:
+        bymonthday = {-1}
+    return freq, int(parts.get("INTERVAL", 1)), byday, bymonthday
+
+
+def period_index(freq, day):
+    if freq == "DAILY":
+        return day.toordinal()
+    if freq == "WEEKLY":
+        return (day.toordinal() - day.weekday()) // 7
+    return day.year * 12 + day.month
+
+
+def matches(rule, day, anchor):
+    freq, interval, byday, bymonthday = rule
+    if byday and day.weekday() not in byday:
+        return False
+    if bymonthday and not bymonthday & {day.day, day.day - monthrange(day.year, day.month)[1] - 1}:
+        return False
+    return (period_index(freq, day) - period_index(freq, anchor)) % interval == 0
+
+
+def next_occurrence(rule, day, anchor):
+    day = max(day, anchor)
+    for _ in range(CALENDAR_CYCLE_DAYS * rule[1]):
+        if matches(rule, day, anchor):
+            return day
+        if day == date.max:
+            break
+        day += timedelta(days=1)
+    return None
+
+
+def next_due_after(rule, last_inspected_on, anchor):
+    if last_inspected_on is None:
+        return next_occurrence(rule, anchor, anchor)
+    covered = next_occurrence(rule, last_inspected_on, anchor)
+    if covered is None:
+        return None
+    return next_occurrence(rule, covered + timedelta(days=1), anchor)
+
+
+def fill_due_columns(apps, schema_editor):
+    Machine = apps.get_model("dashboard", "Machine")
+    InspectionReport = apps.get_model("dashboard", "InspectionReport")
+    latest = dict(
+        InspectionReport.objects.values("machine_id")
+        .annotate(last=models.Max("timestamp"))
+        .values_list("machine_id", "last")
+    )
+    machines = list(Machine.objects.all())
+    for machine in machines:
+        machine.last_inspected_at = latest.get(machine.id)
+        machine.next_due_date = next_due_after(
+            rule_for(machine.inspection_frequency, machine.recurrence_rule),
+            timezone.localdate(machine.last_inspected_at) if machine.last_inspected_at else None,
+            timezone.localdate(machine.created_at),
+        )
+    Machine.objects.bulk_update(machines, ["last_inspected_at", "next_due_date"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0008_machine_recurrence_rule"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="machine",
+            name="last_inspected_at",
+            field=models.DateTimeField(
+                blank=True, db_index=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="machine",
+            name="next_due_date",
+            field=models.DateField(
+                blank=True, db_index=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="machine",
+            index=models.Index(
+                fields=["worker", "next_due_date"], name="machine_worker_next_due"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="machine",
+            index=models.Index(
+                fields=["engineer", "next_due_date"], name="machine_engineer_next_due"
+            ),
+        ),
+        migrations.RunPython(fill_due_columns, migrations.RunPython.noop),
+    ]
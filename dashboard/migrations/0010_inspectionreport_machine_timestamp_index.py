@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0009_machine_last_inspected_at_next_due_date"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="inspectionreport",
+            index=models.Index(
+                fields=["machine", "timestamp"], name="report_machine_timestamp"
+            ),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0010_inspectionreport_machine_timestamp_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DueOccurrence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("due_date", models.DateField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("scheduled", "Scheduled"),
+                            ("completed", "Completed"),
+                            ("pending", "Pending"),
+                            ("missed", "Missed"),
+                        ],
+                        default="scheduled",
+                        max_length=10,
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "machine",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="due_occurrences",
+                        to="dashboard.machine",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["due_date", "status"], name="occurrence_date_status"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("machine", "due_date"), name="unique_due_occurrence"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0012_compliancerollup"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="machine",
+            index=models.Index(fields=["created_at", "id"], name="machine_created_id"),
+        ),
+        migrations.AddIndex(
+            model_name="machine",
+            index=models.Index(
+                fields=["engineer", "created_at", "id"],
+                name="machine_engineer_created_id",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="machine",
+            index=models.Index(
+                fields=["worker", "created_at", "id"], name="machine_worker_created_id"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pendinginspection",
+            index=models.Index(fields=["created_at", "id"], name="pending_created_id"),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0014_updated_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("machine", "Machine"), ("user", "User")],
+                        max_length=10,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                (
+                    "reason",
+                    models.CharField(
+                        choices=[("deleted", "Deleted"), ("unassigned", "Unassigned")],
+                        default="deleted",
+                        max_length=10,
+                    ),
+                ),
+                ("engineer_id", models.BigIntegerField(blank=True, null=True)),
+                ("worker_id", models.BigIntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="inspectionreport",
+            index=models.Index(fields=["updated_at"], name="report_updated"),
+        ),
+        migrations.AddIndex(
+            model_name="machine",
+            index=models.Index(
+                fields=["engineer", "updated_at"], name="machine_engineer_updated"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="machine",
+            index=models.Index(
+                fields=["worker", "updated_at"], name="machine_worker_updated"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pendinginspection",
+            index=models.Index(fields=["updated_at"], name="pending_updated"),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(fields=["created_at"], name="tombstone_created"),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["engineer_id", "created_at"], name="tombstone_engineer_created"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(
+                fields=["worker_id", "created_at"], name="tombstone_worker_created"
+            ),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:55
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def merge_duplicate_reports(apps, schema_editor):
+    """
+    Keep the oldest report per (machine, due_date) so the constraint can be
+    added. Escalations of the dropped duplicates move to the kept report, which
+    stays escalated if any of them was.
+    """
+    InspectionReport = apps.get_model("dashboard", "InspectionReport")
+    Escalation = apps.get_model("dashboard", "Escalation")
+    duplicates = (
+        InspectionReport.objects.values("machine_id", "due_date")
+        .annotate(keep_id=models.Min("id"), rows=models.Count("id"))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates:
+        extra = InspectionReport.objects.filter(
+            machine_id=row["machine_id"], due_date=row["due_date"]
+        ).exclude(id=row["keep_id"])
+        if extra.filter(is_escalated=True).exists():
+            InspectionReport.objects.filter(id=row["keep_id"]).update(is_escalated=True)
+        Escalation.objects.filter(report__in=extra).update(report_id=row["keep_id"])
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0015_tombstone_sync_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IdempotencyKey",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=255)),
+                ("fingerprint", models.CharField(max_length=64)),
+                (
+                    "status_code",
+                    models.PositiveSmallIntegerField(blank=True, null=True),
+                ),
+                (
+                    "response",
+                    models.JSONField(
+                        blank=True,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        null=True,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.RunPython(merge_duplicate_reports, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="inspectionreport",
+            constraint=models.UniqueConstraint(
+                fields=("machine", "due_date"), name="unique_report_machine_due_date"
+            ),
+        ),
+        migrations.AddField(
+            model_name="idempotencykey",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="idempotency_keys",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="idempotencykey",
+            constraint=models.UniqueConstraint(
+                fields=("user", "key"), name="unique_idempotency_key"
+            ),
+        ),
+    ]
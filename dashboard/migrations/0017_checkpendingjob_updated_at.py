@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0016_report_unique_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="checkpendingjob",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dashboard", "0017_checkpendingjob_updated_at"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="machine",
+            name="machine_worker_next_due",
+        ),
+        migrations.RemoveIndex(
+            model_name="machine",
+            name="machine_engineer_next_due",
+        ),
+        migrations.AlterField(
+            model_name="machine",
+            name="next_due_date",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+    ]
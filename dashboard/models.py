@@ -1,7 +1,93 @@
+from datetime import datetime, timedelta
+from functools import reduce
+from operator import or_
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import Count, Exists, OuterRef, Q
 from authentication.models import CustomUser
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .recurrence import (
+    FREQUENCY_RULES, current_period, machine_anchor, machine_rule, next_due_after, rule_for, validate_rule,
+)
+
+
+class MachineQuerySet(models.QuerySet):
+    def due(self, day):
+        """
+        Machines due on ``day`` as a queryset: ``day`` is one of their due
+        dates and no inspection was reported in the period ending on it.
+        Whether ``day`` is a due date, and where its period starts, is decided
+        in Python with the recurrence rules: once per built-in frequency, and
+        per machine for custom rules (one extra query fetching those). Coverage
+        is read from InspectionReport, so the result doesn't depend on the
+        display-only next_due_date or on DueOccurrence being up to date.
+        """
+        starts = {}  # period start -> Qs of the machines whose current period starts then
+        day_ends = timezone.make_aware(datetime.combine(day + timedelta(days=1), datetime.min.time()))
+        for frequency in FREQUENCY_RULES:
+            start = current_period(rule_for(frequency), day)
+            if start is not None:
+                starts.setdefault(start, []).append(
+                    Q(recurrence_rule="", inspection_frequency=frequency, created_at__lt=day_ends)
+                )
+
+        custom = {}
+        rows = self.exclude(recurrence_rule="").values_list("id", "inspection_frequency", "recurrence_rule", "created_at")
+        for machine_id, frequency, recurrence_rule, created_at in rows:
+            start = current_period(rule_for(frequency, recurrence_rule), day, timezone.localdate(created_at))
+            if start is not None:
+                custom.setdefault(start, []).append(machine_id)
+        for start, ids in custom.items():
+            starts.setdefault(start, []).append(Q(id__in=ids))
+
+        if not starts:
+            return self.none()
+        due_today = Q()
+        for start, members in starts.items():
+            covered = InspectionReport.objects.filter(
+                machine=OuterRef("pk"),
+                timestamp__gte=timezone.make_aware(datetime.combine(start, datetime.min.time())),
+                timestamp__lt=day_ends,
+            )
+            due_today |= reduce(or_, members) & ~Q(Exists(covered))
+        return self.filter(due_today)
+
+    def summary(self, day, exclude_escalated_pendings=False):
+        """
+        Due, pending and escalated counts in one aggregate statement (see
+        due() for what counts as due, and its extra query for custom rules).
+        Escalated counts machines, not reports.
+        """
+        escalated = Q(Exists(InspectionReport.objects.filter(machine=OuterRef("pk"), is_escalated=True)))
+
+        open_pending = Q(pendinginspection__resolved=False)
+        if exclude_escalated_pendings:
+            open_pending &= ~escalated
+        return self.aggregate(
+            due=Count("id", filter=Q(id__in=self.due(day).values("id")), distinct=True),
+            pending=Count("pendinginspection", filter=open_pending),
+            escalated=Count("id", filter=escalated, distinct=True),
+        )
+
+    def breakdown(self):
+        """
+        One grouped query: per location x frequency x status, the machine
+        count, assigned / unassigned machines, machines with an open
+        escalation and open pending inspections.
+        """
+        open_escalation = Q(Exists(Escalation.objects.filter(machine=OuterRef("pk"), status="pending")))
+        return self.values("location", "inspection_frequency", "status").annotate(
+            total=Count("id", distinct=True),
+            assigned=Count("id", filter=Q(worker__isnull=False), distinct=True),
+            unassigned=Count("id", filter=Q(worker__isnull=True), distinct=True),
+            escalated=Count("id", filter=open_escalation, distinct=True),
+            pending=Count("pendinginspection", filter=Q(pendinginspection__resolved=False)),
+        ).order_by("location", "inspection_frequency", "status")
+
+
 class Machine(models.Model):
     class InspectionFrequency(models.TextChoices):
         DAILY = "daily", _("Daily")
@@ -15,18 +101,95 @@ class Machine(models.Model):
     inspection_frequency = models.CharField(
         max_length=10, choices=InspectionFrequency.choices, default=InspectionFrequency.MONTHLY
     )
+    # Optional RRULE-style override of inspection_frequency, see dashboard/recurrence.py
+    recurrence_rule = models.CharField(
+        max_length=255, blank=True, default="", validators=[validate_rule],
+        help_text="e.g. FREQ=DAILY;INTERVAL=3, FREQ=WEEKLY;BYDAY=MO,TH or FREQ=MONTHLY;BYMONTHDAY=15",
+    )
     location = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # ETag / Last-Modified of the read endpoints
+    # Last time a field that decides due dates changed (see SCHEDULE_FIELDS)
+    schedule_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # Denormalized from InspectionReport for display (machine detail, compact
+    # lists); kept current by record_inspection() and save(), rebuilt by the
+    # rebuild_due_columns command. due() doesn't read them, so next_due_date
+    # carries no index.
+    last_inspected_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+    next_due_date = models.DateField(null=True, blank=True, editable=False)
+
+    SCHEDULE_FIELDS = ("inspection_frequency", "recurrence_rule", "created_at")
+
+    objects = MachineQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # keyset pagination (llf_backend/pagination.py)
+            models.Index(fields=["created_at", "id"], name="machine_created_id"),
+            models.Index(fields=["engineer", "created_at", "id"], name="machine_engineer_created_id"),
+            models.Index(fields=["worker", "created_at", "id"], name="machine_worker_created_id"),
+            # delta sync (dashboard/sync.py)
+            models.Index(fields=["engineer", "updated_at"], name="machine_engineer_updated"),
+            models.Index(fields=["worker", "updated_at"], name="machine_worker_updated"),
+        ]
 
     def __str__(self):
         return self.name
 
+    def refresh_due_columns(self):
+        """Recompute next_due_date from last_inspected_at and the schedule (doesn't save)."""
+        last_inspected_on = timezone.localdate(self.last_inspected_at) if self.last_inspected_at else None
+        anchor = machine_anchor(self) or timezone.localdate()  # not saved yet: created today
+        self.next_due_date = next_due_after(machine_rule(self), last_inspected_on, anchor)
+
+    def note_inspection(self, timestamp):
+        """record_inspection() without the save, for callers that bulk_update."""
+        if self.last_inspected_at is None or timestamp > self.last_inspected_at:
+            self.last_inspected_at = timestamp
+        self.refresh_due_columns()
+
+    def record_inspection(self, timestamp):
+        """Account for a new report; call inside the transaction that saves it."""
+        self.note_inspection(timestamp)
+        self.save(update_fields=["last_inspected_at", "next_due_date"])
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_schedule = instance._schedule_values()
+        instance._loaded_worker_id = instance.__dict__.get("worker_id")
+        return instance
+
+    def _schedule_values(self):
+        # __dict__ lookup so deferred fields aren't fetched just for the comparison
+        return tuple(self.__dict__.get(field) for field in self.SCHEDULE_FIELDS)
+
+    def schedule_changed(self):
+        loaded = getattr(self, "_loaded_schedule", None)
+        return loaded is not None and loaded != self._schedule_values()
+
+    def save(self, *args, **kwargs):
+        if self.schedule_changed():
+            self.schedule_changed_at = timezone.now()
+            self.refresh_due_columns()
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "schedule_changed_at", "next_due_date"}
+        elif self._state.adding:
+            self.refresh_due_columns()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "updated_at"}  # auto_now only writes listed fields
+        super().save(*args, **kwargs)
+        self._loaded_schedule = self._schedule_values()
+        self._loaded_worker_id = self.worker_id
+
 
  
 class InspectionReport(models.Model):
     machine = models.ForeignKey(Machine, on_delete=models.CASCADE)
     worker = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     timestamp = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     due_date = models.DateField()  # When the inspection was expected
 
     # Boolean checkboxes for inspection outcome
@@ -41,6 +204,17 @@ class InspectionReport(models.Model):
 
     is_escalated = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # inspections in a period, per machine (Machine.objects.due)
+            models.Index(fields=["machine", "timestamp"], name="report_machine_timestamp"),
+            models.Index(fields=["updated_at"], name="report_updated"),  # delta sync
+        ]
+        constraints = [
+            # One report per machine and due date; submissions rely on the insert conflict
+            models.UniqueConstraint(fields=["machine", "due_date"], name="unique_report_machine_due_date"),
+        ]
+
     def __str__(self):
         return f"{self.machine.name} - {self.worker.username} - {self.due_date}"
 
@@ -52,6 +226,22 @@ class PendingInspection(models.Model):
     date_due = models.DateField()  # The date it was due
     resolved = models.BooleanField(default=False)  # Updated when inspection is done
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="pending_created_id"),  # keyset pagination
+            models.Index(fields=["updated_at"], name="pending_updated"),  # delta sync
+        ]
+        constraints = [
+            # At most one open pending per machine and due date, so concurrent
+            # check_pending runs (or shards) can't record the same miss twice.
+            models.UniqueConstraint(
+                fields=["machine", "date_due"],
+                condition=models.Q(resolved=False),
+                name="unique_open_pending_inspection",
+            ),
+        ]
 
 class Escalation(models.Model):
     machine = models.ForeignKey(Machine, on_delete=models.CASCADE)
@@ -62,3 +252,179 @@ class Escalation(models.Model):
     status = models.CharField(max_length=20, choices=(('pending', 'Pending'), ('resolved', 'Resolved')), default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
     resolved_at = models.DateTimeField(null=True, blank=True)
+
+
+class CommandCheckpoint(models.Model):
+    """Last date fully processed by an incremental management command."""
+    name = models.CharField(max_length=100, unique=True)
+    last_date = models.DateField()
+    # Start of the run that wrote the checkpoint; changes after it are not covered yet
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.name} - {self.last_date}"
+
+
+class CheckPendingJob(models.Model):
+    """A check_pending run queued from the API; progress is written here so any worker can report it."""
+    class Status(models.TextChoices):
+        QUEUED = "queued", _("Queued")
+        RUNNING = "running", _("Running")
+        SUCCEEDED = "succeeded", _("Succeeded")
+        FAILED = "failed", _("Failed")
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    options = models.JSONField(default=dict)
+    requested_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True)
+    days_done = models.PositiveIntegerField(default=0)
+    days_total = models.PositiveIntegerField(default=0)
+    pendings_created = models.PositiveIntegerField(default=0)
+    output = models.TextField(blank=True, default="")
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # bumped on every progress update
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"check_pending #{self.id} - {self.status}"
+
+
+class SchedulerLock(models.Model):
+    """Lease for one periodic task: renewed while it runs, then pushed to its next due time."""
+    name = models.CharField(max_length=100, unique=True)
+    owner = models.CharField(max_length=255, blank=True, default="")
+    locked_until = models.DateTimeField()
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+
+    def __str__(self):
+        return f"{self.name} - {self.owner}"
+
+
+class DueOccurrenceQuerySet(models.QuerySet):
+    def mark(self, pairs, status):
+        """Set the status of existing (machine_id, due_date) rows; one UPDATE per distinct date."""
+        by_date = {}
+        for machine_id, due_date in pairs:
+            by_date.setdefault(due_date, []).append(machine_id)
+        updated = 0
+        for due_date, machine_ids in by_date.items():
+            rows = self.filter(due_date=due_date, machine_id__in=machine_ids)
+            if status != DueOccurrence.Status.COMPLETED:
+                rows = rows.exclude(status=DueOccurrence.Status.COMPLETED)  # never un-complete a date
+            updated += rows.update(status=status)
+        return updated
+
+
+class DueOccurrence(models.Model):
+    """
+    One row per machine and due date, from the machine's creation to a rolling
+    horizon ahead (generate_due_occurrences). Report submission and pending
+    detection update the status in place.
+    """
+    class Status(models.TextChoices):
+        SCHEDULED = "scheduled", _("Scheduled")
+        COMPLETED = "completed", _("Completed")
+        PENDING = "pending", _("Pending")
+        MISSED = "missed", _("Missed")
+
+    machine = models.ForeignKey(Machine, on_delete=models.CASCADE, related_name="due_occurrences")
+    due_date = models.DateField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.SCHEDULED)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = DueOccurrenceQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["machine", "due_date"], name="unique_due_occurrence"),
+        ]
+        indexes = [
+            models.Index(fields=["due_date", "status"], name="occurrence_date_status"),
+        ]
+
+    def __str__(self):
+        return f"{self.machine_id} - {self.due_date} - {self.status}"
+
+
+class ComplianceRollup(models.Model):
+    """
+    Daily due / completed / pending / missed / escalated counts per engineer,
+    location and frequency, filled from DueOccurrence by rollup_compliance.
+    Analytics read only this table.
+    """
+    date = models.DateField()
+    engineer = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="compliance_rollups")
+    location = models.CharField(max_length=255)
+    frequency = models.CharField(max_length=10, choices=Machine.InspectionFrequency.choices)
+    due = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    pending = models.PositiveIntegerField(default=0)
+    missed = models.PositiveIntegerField(default=0)
+    escalated = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["engineer", "date", "location", "frequency"], name="unique_compliance_rollup"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.engineer_id} - {self.date} - {self.location} - {self.frequency}"
+
+
+class Tombstone(models.Model):
+    """
+    A machine or user that left devices' sync scope (dashboard/sync.py):
+    deleted, or a machine taken away from its worker. Pruned by
+    prune_tombstones after SYNC_TOMBSTONE_DAYS.
+    """
+    class Kind(models.TextChoices):
+        MACHINE = "machine", _("Machine")
+        USER = "user", _("User")
+
+    class Reason(models.TextChoices):
+        DELETED = "deleted", _("Deleted")
+        UNASSIGNED = "unassigned", _("Unassigned")
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    object_id = models.BigIntegerField()
+    reason = models.CharField(max_length=10, choices=Reason.choices, default=Reason.DELETED)
+    # Plain ids, not foreign keys: the users may be deleted before their devices sync
+    engineer_id = models.BigIntegerField(null=True, blank=True)
+    worker_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"], name="tombstone_created"),
+            models.Index(fields=["engineer_id", "created_at"], name="tombstone_engineer_created"),
+            models.Index(fields=["worker_id", "created_at"], name="tombstone_worker_created"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} - {self.reason}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client's Idempotency-Key and the response its first request got
+    (dashboard/idempotency.py). status_code is null while that request runs.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="idempotency_keys")
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # sha256 of method, path and body
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="unique_idempotency_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.key}"
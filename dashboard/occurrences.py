@@ -0,0 +1,94 @@
+"""
+Bulk generation of DueOccurrence rows.
+
+Due dates come from the recurrence rules (dashboard/recurrence.py); statuses
+are classified from reports and open pendings fetched in bulk per chunk of
+machines, and written with one upsert per chunk.
+"""
+from django.utils.timezone import localdate
+
+from .models import CommandCheckpoint, DueOccurrence, InspectionReport, Machine, PendingInspection
+from .recurrence import as_dates, expand
+
+DEFAULT_BATCH_SIZE = 500  # machines per chunk
+CHECKPOINT_NAME = "due_occurrences"  # written by generate_due_occurrences
+
+
+def classify(due_date, today, completed, pending):
+    if completed:
+        return DueOccurrence.Status.COMPLETED
+    if due_date >= today:
+        return DueOccurrence.Status.SCHEDULED
+    if pending:
+        return DueOccurrence.Status.PENDING
+    return DueOccurrence.Status.MISSED
+
+
+def _generate_chunk(chunk, start_date, end_date, today):
+    chunk_start = start_date or min(created_on for _, _, _, created_on in chunk)
+    if chunk_start > end_date:
+        return 0
+    due_ids, due_days = expand(chunk, chunk_start, end_date)
+    if not due_ids.size:
+        return 0
+
+    machine_ids = [machine[0] for machine in chunk]
+    completed = set(
+        InspectionReport.objects.filter(
+            machine_id__in=machine_ids,
+            due_date__range=(chunk_start, end_date),
+        ).values_list('machine_id', 'due_date')
+    )
+    pending = set(
+        PendingInspection.objects.filter(
+            machine_id__in=machine_ids,
+            date_due__range=(chunk_start, end_date),
+            resolved=False,
+        ).values_list('machine_id', 'date_due')
+    )
+
+    rows = [
+        DueOccurrence(
+            machine_id=machine_id,
+            due_date=due_date,
+            status=classify(due_date, today, (machine_id, due_date) in completed, (machine_id, due_date) in pending),
+        )
+        for machine_id, due_date in zip(due_ids.tolist(), as_dates(due_days))
+    ]
+    DueOccurrence.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['machine', 'due_date'],
+        update_fields=['status', 'updated_at'],
+    )
+    return len(rows)
+
+
+def generate_occurrences(machines, start_date, end_date, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Upsert the DueOccurrence rows of ``machines`` between start_date (or each
+    machine's creation date when None) and end_date. Returns the row count.
+    """
+    today = localdate()
+    machines = list(machines.order_by('id').values_list(
+        'id', 'inspection_frequency', 'recurrence_rule', 'created_at__date'
+    ))
+    written = 0
+    for offset in range(0, len(machines), batch_size):
+        written += _generate_chunk(machines[offset:offset + batch_size], start_date, end_date, today)
+    return written
+
+
+def refresh_machine(machine):
+    """
+    Rebuild the rows of one machine whose schedule was just created or changed,
+    up to the horizon of the last generate_due_occurrences run.
+    """
+    checkpoint = CommandCheckpoint.objects.filter(name=CHECKPOINT_NAME).first()
+    if checkpoint is None:
+        return 0  # never generated yet: the first run covers this machine
+    DueOccurrence.objects.filter(
+        machine=machine, due_date__gte=localdate(), status=DueOccurrence.Status.SCHEDULED
+    ).delete()
+    return generate_occurrences(Machine.objects.filter(id=machine.id), None, checkpoint.last_date)
@@ -0,0 +1,178 @@
+"""
+Set-based detection of missed inspections.
+
+Instead of asking the database about every (machine, day) pair, the engine
+expands all due pairs for a window of days in memory, anti-joins them
+against the reports and open pendings of that window in two bulk queries
+and inserts whatever is missing with ``bulk_create``. Counts cover only the
+rows this run inserted, not those a concurrent run got to first.
+
+``detect_pending_parallel`` runs the same engine over id-range shards of the
+Machine table in a process pool, one DB connection per worker process.
+"""
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import django
+from django.db import IntegrityError, connections, transaction
+
+from .models import DueOccurrence, Machine, InspectionReport, PendingInspection
+from .recurrence import as_dates, expand
+from .summary_cache import invalidate_all
+
+# Upper bound on the (machine, due date) pairs held in memory at once.
+DEFAULT_BATCH_SIZE = 5000
+
+
+def _days(start_date, end_date):
+    return [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+
+def _insert_pendings(pairs, batch_size):
+    """
+    Insert a pending for each (machine_id, due date) pair and return the pairs
+    actually inserted. A concurrent run may have inserted some of them since
+    they were read; unique_open_pending_inspection rejects the insert, and the
+    ones now open are dropped before trying again, so only our rows are counted.
+    """
+    while pairs:
+        try:
+            with transaction.atomic():
+                PendingInspection.objects.bulk_create(
+                    [PendingInspection(machine_id=machine_id, date_due=day) for machine_id, day in pairs],
+                    batch_size=batch_size,
+                )
+            return pairs
+        except IntegrityError:
+            days = [day for _, day in pairs]
+            now_open = set(
+                PendingInspection.objects.filter(
+                    machine_id__in={machine_id for machine_id, _ in pairs},
+                    date_due__range=(min(days), max(days)),
+                    resolved=False,
+                ).values_list('machine_id', 'date_due')
+            )
+            remaining = [pair for pair in pairs if pair not in now_open]
+            if len(remaining) == len(pairs):
+                raise  # not a conflict with another run
+            pairs = remaining
+    return pairs
+
+
+def _record_chunk(chunk, start_date, end_date, batch_size):
+    """Insert the missing pendings for one chunk of machines over one window."""
+    # Nothing is due before the machine existed; expand() takes care of that
+    due_ids, due_days = expand(chunk, start_date, end_date)
+    candidates = list(zip(due_ids.tolist(), as_dates(due_days)))
+    if not candidates:
+        return Counter()
+
+    machine_ids = [machine[0] for machine in chunk]
+    inspected = set(
+        InspectionReport.objects.filter(
+            machine_id__in=machine_ids,
+            due_date__range=(start_date, end_date),
+        ).values_list('machine_id', 'due_date')
+    )
+    already_pending = set(
+        PendingInspection.objects.filter(
+            machine_id__in=machine_ids,
+            date_due__range=(start_date, end_date),
+            resolved=False,
+        ).values_list('machine_id', 'date_due')
+    )
+
+    missing = [pair for pair in candidates if pair not in inspected and pair not in already_pending]
+    missing = _insert_pendings(missing, batch_size)
+    DueOccurrence.objects.mark(missing, DueOccurrence.Status.PENDING)
+    if missing:
+        invalidate_all()  # bulk_create sends no post_save
+    return Counter(day for _, day in missing)
+
+
+def detect_pending(start_date, end_date, machines=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Record a PendingInspection for every missed due date between start_date
+    and end_date (inclusive) and yield ``(day, new_pendings)`` for each day,
+    in order, as soon as the window containing it is done. Days before a
+    machine's creation date are never due.
+
+    The number of queries depends on the number of windows and chunks
+    (roughly pairs / batch_size), not on the number of machines or days.
+    """
+    batch_size = max(1, batch_size)
+    if machines is None:
+        machines = Machine.objects.all()
+    machines = list(machines.order_by('id').values_list(
+        'id', 'inspection_frequency', 'recurrence_rule', 'created_at__date'
+    ))
+
+    # Size windows so that a window never holds more than ~batch_size pairs;
+    # a fleet larger than batch_size is additionally split into machine chunks.
+    window_days = max(1, batch_size // max(1, len(machines)))
+
+    window_start = start_date
+    while window_start <= end_date:
+        window_end = min(window_start + timedelta(days=window_days - 1), end_date)
+        days = _days(window_start, window_end)
+
+        new_pendings = Counter()
+        for offset in range(0, len(machines), batch_size):
+            chunk = machines[offset:offset + batch_size]
+            new_pendings.update(_record_chunk(chunk, window_start, window_end, batch_size))
+
+        for day in days:
+            yield day, new_pendings[day]
+
+        window_start = window_end + timedelta(days=1)
+
+
+def machine_shards(count):
+    """Split the Machine table into at most ``count`` contiguous id ranges of similar size."""
+    ids = list(Machine.objects.order_by('id').values_list('id', flat=True))
+    if not ids:
+        return []
+    size = -(-len(ids) // max(1, count))  # ceil division
+    return [(ids[i], ids[min(i + size, len(ids)) - 1]) for i in range(0, len(ids), size)]
+
+
+def _init_worker():
+    # Works for both fork and spawn start methods: make sure Django is set up
+    # and that the worker never reuses a connection object from the parent.
+    django.setup()
+    connections.close_all()
+
+
+def _detect_shard(shard, start_date, end_date, batch_size):
+    first_id, last_id = shard
+    machines = Machine.objects.filter(id__range=(first_id, last_id))
+    try:
+        return list(detect_pending(start_date, end_date, machines=machines, batch_size=batch_size))
+    finally:
+        connections.close_all()
+
+
+def detect_pending_parallel(start_date, end_date, workers, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Same contract as ``detect_pending`` but the fleet is split into id-range
+    shards processed by ``workers`` processes. Per-day counts are merged and
+    yielded once every shard has finished.
+    """
+    shards = machine_shards(workers)
+    new_pendings = Counter()
+
+    if shards:
+        # Forked children must not share the parent's open connection.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=len(shards), initializer=_init_worker) as pool:
+            futures = [
+                pool.submit(_detect_shard, shard, start_date, end_date, batch_size)
+                for shard in shards
+            ]
+            for future in futures:
+                for day, count in future.result():
+                    new_pendings[day] += count
+
+    for day in _days(start_date, end_date):
+        yield day, new_pendings[day]
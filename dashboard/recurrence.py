@@ -0,0 +1,311 @@
+"""
+Due-date rules for machines.
+
+Every machine follows one recurrence rule, written as a small RRULE subset:
+
+    FREQ=DAILY|WEEKLY|MONTHLY    required
+    INTERVAL=n                   every n days / weeks / months (default 1)
+    BYDAY=MO,TH                  only on these weekdays (WEEKLY defaults to SA)
+    BYMONTHDAY=15,-1             only on these days of the month, negative
+                                 counts from the end (MONTHLY defaults to -1)
+
+Machines without a custom ``recurrence_rule`` use the rule of their
+``inspection_frequency`` (see FREQUENCY_RULES). INTERVAL is counted from the
+machine's creation date, and nothing is due before that date.
+
+Occurrences are computed in bulk as NumPy ``datetime64[D]`` arrays; the
+scalar helpers below are thin wrappers around the same code.
+"""
+from calendar import monthrange
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+DAILY = "DAILY"
+WEEKLY = "WEEKLY"
+MONTHLY = "MONTHLY"
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+FREQUENCY_RULES = {
+    "daily": "FREQ=DAILY",
+    "weekly": "FREQ=WEEKLY;BYDAY=SA",  # weekly inspections are due on Saturday
+    "monthly": "FREQ=MONTHLY;BYMONTHDAY=-1",  # ...monthly ones on the last day of the month
+}
+
+# First search window for the previous / next occurrence, per FREQ and per unit
+# of INTERVAL. It covers the plain rules; combinations such as BYMONTHDAY=13
+# with BYDAY=FR can go more than a year between occurrences, so searches carry
+# on with wider windows (see _windows).
+_SEARCH_DAYS = {DAILY: 7, WEEKLY: 7, MONTHLY: 62}
+# The Gregorian calendar repeats every 400 years; with INTERVAL=n the rule does
+# within n cycles, so a rule with no occurrence in that span has none at all.
+_CALENDAR_CYCLE_DAYS = 146097
+
+
+class Rule(NamedTuple):
+    freq: str
+    interval: int = 1
+    byday: tuple = ()
+    bymonthday: tuple = ()
+
+
+@lru_cache(maxsize=256)
+def parse_rule(text):
+    """Parse a rule string into a Rule; raises ValueError if it is malformed."""
+    parts = {}
+    for part in filter(None, (p.strip() for p in text.upper().split(";"))):
+        key, sep, value = part.partition("=")
+        if not sep or not value:
+            raise ValueError(f"Malformed rule part '{part}'.")
+        parts[key] = value
+
+    freq = parts.pop("FREQ", None)
+    if freq not in (DAILY, WEEKLY, MONTHLY):
+        raise ValueError("FREQ must be DAILY, WEEKLY or MONTHLY.")
+
+    try:
+        interval = int(parts.pop("INTERVAL", 1))
+        bymonthday = tuple(sorted({int(d) for d in parts.pop("BYMONTHDAY").split(",")})) if "BYMONTHDAY" in parts else ()
+    except ValueError:
+        raise ValueError("INTERVAL and BYMONTHDAY must be integers.")
+    if interval < 1:
+        raise ValueError("INTERVAL must be at least 1.")
+    if any(d == 0 or not -31 <= d <= 31 for d in bymonthday):
+        raise ValueError("BYMONTHDAY values must be between -31 and 31, excluding 0.")
+
+    byday = ()
+    if "BYDAY" in parts:
+        names = parts.pop("BYDAY").split(",")
+        if any(name not in WEEKDAYS for name in names):
+            raise ValueError(f"BYDAY values must be among {', '.join(WEEKDAYS)}.")
+        byday = tuple(sorted({WEEKDAYS.index(name) for name in names}))
+
+    if parts:
+        raise ValueError(f"Unsupported rule part(s): {', '.join(parts)}.")
+
+    if freq == WEEKLY and not byday:
+        byday = (WEEKDAYS.index("SA"),)
+    if freq == MONTHLY and not bymonthday:
+        bymonthday = (-1,)
+    return Rule(freq, interval, byday, bymonthday)
+
+
+def validate_rule(text):
+    """Model field validator for Machine.recurrence_rule."""
+    if not text:
+        return
+    try:
+        parse_rule(text)
+    except ValueError as e:
+        raise ValidationError(str(e))
+
+
+def rule_for(frequency, recurrence_rule=""):
+    return parse_rule(recurrence_rule or FREQUENCY_RULES[frequency])
+
+
+def machine_rule(machine):
+    return rule_for(machine.inspection_frequency, machine.recurrence_rule)
+
+
+def machine_anchor(machine):
+    """Creation date of a machine: INTERVAL counts from it and nothing is due before it."""
+    return timezone.localdate(machine.created_at) if machine.created_at else None
+
+
+# ---------------  calendar boundaries ----------------
+
+@lru_cache(maxsize=1024)
+def month_bounds(year, month):
+    """First and last date of a month."""
+    return date(year, month, 1), date(year, month, monthrange(year, month)[1])
+
+
+# ---------------  vectorized expansion ----------------
+
+def _as_day(value):
+    return np.datetime64(value, "D")
+
+
+def _weekday(days):
+    # 1970-01-01 (day 0) was a Thursday; Monday is 0 like date.weekday()
+    return (days.astype(np.int64) + 3) % 7
+
+
+def _period_index(freq, days):
+    """Index of the day / week / month each date falls in, for INTERVAL arithmetic."""
+    if freq == DAILY:
+        return days.astype(np.int64)
+    if freq == WEEKLY:
+        return (days.astype(np.int64) + 3) // 7  # weeks starting on Monday
+    return days.astype("datetime64[M]").astype(np.int64)
+
+
+def _candidates(rule, start, end):
+    """All dates in [start, end] matching the rule, ignoring INTERVAL."""
+    days = np.arange(_as_day(start), _as_day(end) + 1, dtype="datetime64[D]")
+    mask = np.ones(days.shape, dtype=bool)
+    if rule.byday:
+        mask &= np.isin(_weekday(days), rule.byday)
+    if rule.bymonthday:
+        months = days.astype("datetime64[M]")
+        day_of_month = (days - months.astype("datetime64[D]")).astype(np.int64) + 1
+        month_length = ((months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")).astype(np.int64)
+        positive = np.array([d for d in rule.bymonthday if d > 0])
+        negative = np.array([d for d in rule.bymonthday if d < 0])
+        month_mask = np.isin(day_of_month, positive)
+        if negative.size:
+            month_mask |= np.isin(day_of_month - month_length - 1, negative)
+        mask &= month_mask
+    return days[mask]
+
+
+def occurrences(rule, start, end, anchor=None):
+    """Due dates of one rule between start and end (inclusive) as datetime64[D]."""
+    if anchor is not None:
+        start = max(start, anchor)
+    if start > end:
+        return np.empty(0, dtype="datetime64[D]")
+    days = _candidates(rule, start, end)
+    if rule.interval > 1 and anchor is not None:
+        offset = _period_index(rule.freq, days) - _period_index(rule.freq, np.array([_as_day(anchor)]))[0]
+        days = days[offset % rule.interval == 0]
+    return days
+
+
+def expand(machines, start, end):
+    """
+    Bulk-expand due dates for many machines.
+
+    ``machines`` is an iterable of ``(machine_id, frequency, recurrence_rule,
+    created_on)`` tuples. Returns two aligned arrays: machine ids (int64) and
+    due dates (datetime64[D]), covering every due date in [start, end].
+    """
+    groups = {}
+    for machine_id, frequency, recurrence_rule, created_on in machines:
+        groups.setdefault(rule_for(frequency, recurrence_rule), []).append((machine_id, created_on))
+
+    all_ids, all_days = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype="datetime64[D]")]
+    for rule, members in groups.items():
+        days = _candidates(rule, start, end)
+        if not days.size:
+            continue
+        ids = np.array([machine_id for machine_id, _ in members], dtype=np.int64)
+        created = np.array([_as_day(created_on) for _, created_on in members], dtype="datetime64[D]")
+
+        pair_ids = np.repeat(ids, days.size)
+        pair_days = np.tile(days, ids.size)
+        pair_created = np.repeat(created, days.size)
+        mask = pair_days >= pair_created
+        if rule.interval > 1:
+            offset = _period_index(rule.freq, pair_days) - _period_index(rule.freq, pair_created)
+            mask &= offset % rule.interval == 0
+
+        all_ids.append(pair_ids[mask])
+        all_days.append(pair_days[mask])
+    return np.concatenate(all_ids), np.concatenate(all_days)
+
+
+def as_dates(days):
+    """datetime64[D] array -> list of datetime.date."""
+    return days.astype(object).tolist()
+
+
+# ---------------  scalar helpers ----------------
+
+def is_due_on(rule, day, anchor=None):
+    return occurrences(rule, day, day, anchor).size > 0
+
+
+def _windows(rule):
+    """
+    Lengths, in days, of the consecutive windows a search walks through: small
+    first, never more than a calendar cycle at a time, and INTERVAL calendar
+    cycles in total.
+    """
+    size, left = _SEARCH_DAYS[rule.freq] * rule.interval, _CALENDAR_CYCLE_DAYS * rule.interval
+    while left > 0:
+        size = min(size, _CALENDAR_CYCLE_DAYS, left)
+        yield size
+        left -= size
+        size *= 8
+
+
+def previous_occurrence(rule, day, anchor=None):
+    """Last due date strictly before ``day``, or None."""
+    end = day - timedelta(days=1)
+    for size in _windows(rule):
+        start = date.min if (end - date.min).days < size else end - timedelta(days=size - 1)
+        days = occurrences(rule, start, end, anchor)
+        if days.size:
+            return days[-1].astype(object)
+        if start == date.min or (anchor is not None and start <= anchor):
+            break
+        end = start - timedelta(days=1)
+    return None
+
+
+def next_occurrence(rule, day, anchor=None):
+    """First due date on or after ``day``, or None."""
+    start = day if anchor is None else max(day, anchor)
+    for size in _windows(rule):
+        end = date.max if (date.max - start).days < size else start + timedelta(days=size - 1)
+        days = occurrences(rule, start, end, anchor)
+        if days.size:
+            return days[0].astype(object)
+        if end == date.max:
+            break
+        start = end + timedelta(days=1)
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _current_period(rule, day, anchor):
+    if not is_due_on(rule, day, anchor):
+        return None
+    return period_start(rule, day, anchor)
+
+
+def current_period(rule, day, anchor=None):
+    """
+    Start of the period ending on ``day`` if ``day`` is a due date, else None.
+    Memoized. Without INTERVAL the anchor only cuts off what lies before it,
+    so it is applied outside the cache and machines sharing a rule share the
+    cache entry.
+    """
+    if anchor is None or rule.interval > 1:
+        return _current_period(rule, day, anchor)
+    if day < anchor:
+        return None
+    start = _current_period(rule, day, None)
+    return None if start is None else max(start, anchor)
+
+
+def period_start(rule, day, anchor=None):
+    """
+    First day of the period that ends on the due date ``day``: an inspection
+    done anywhere in [period_start, day] counts for that due date.
+    """
+    previous = previous_occurrence(rule, day, anchor)
+    if previous is not None:
+        return previous + timedelta(days=1)
+    return anchor or day
+
+
+def next_due_after(rule, last_inspected_on, anchor):
+    """
+    First due date not yet covered by an inspection. An inspection on day L
+    covers the first due date on or after L, so the next one is due after
+    that; a machine never inspected is due from its first due date.
+    """
+    if last_inspected_on is None:
+        return next_occurrence(rule, anchor, anchor)
+    covered = next_occurrence(rule, last_inspected_on, anchor)
+    if covered is None:
+        return None
+    return next_occurrence(rule, covered + timedelta(days=1), anchor)
@@ -0,0 +1,137 @@
+"""
+In-process periodic scheduler for maintenance commands.
+
+Every web worker runs the same scheduler thread. Before running a task, a
+worker tries to take the task's SchedulerLock lease with one conditional
+UPDATE. Only the worker whose UPDATE matched a row runs the task, so each
+task runs once per interval however many gunicorn workers there are.
+
+The lease lasts SCHEDULER_LEASE seconds and is renewed by a helper thread
+for as long as the task runs, so a run longer than its interval still
+can't overlap with another worker's. If the process dies, the lease stops
+being renewed and another worker takes over once it expires. When the run
+ends, locked_until moves to the next due time (start + interval).
+
+Configure with SCHEDULER_ENABLED, SCHEDULER_LEASE and SCHEDULED_COMMANDS in
+settings.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, close_old_connections, connection
+from django.utils.timezone import now
+
+from .models import SchedulerLock
+
+logger = logging.getLogger(__name__)
+
+OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+_started = False
+_start_lock = threading.Lock()
+
+
+def try_acquire(name, lease):
+    """Take the lease for ``name`` for ``lease`` seconds if nobody holds it."""
+    current = now()
+    try:
+        SchedulerLock.objects.get_or_create(name=name, defaults={"locked_until": current})
+    except IntegrityError:
+        return False  # another worker created the row at the same moment; it takes this round
+    return SchedulerLock.objects.filter(name=name, locked_until__lte=current).update(
+        owner=OWNER,
+        locked_until=current + timedelta(seconds=lease),
+        last_run_at=current,
+    ) == 1
+
+
+def renew(name, lease):
+    """Push our lease on ``name`` to ``lease`` seconds from now; False if it is no longer ours."""
+    return SchedulerLock.objects.filter(name=name, owner=OWNER).update(
+        locked_until=now() + timedelta(seconds=lease),
+    ) == 1
+
+
+@contextmanager
+def holding(name, lease):
+    """Keep renewing the lease on ``name`` while the block runs."""
+    stop = threading.Event()
+
+    def keep_renewing():
+        try:
+            while not stop.wait(lease / 3):
+                if not renew(name, lease):
+                    logger.warning("Lost the scheduler lease on %s", name)
+                    return
+        except Exception:
+            logger.exception("Renewing the scheduler lease on %s failed", name)
+        finally:
+            connection.close()
+
+    renewer = threading.Thread(target=keep_renewing, name=f"scheduler-lease-{name}", daemon=True)
+    renewer.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        renewer.join()
+
+
+def run_task(name, task, lease):
+    started_at = now()
+    started = time.monotonic()
+    out = StringIO()
+    try:
+        with holding(name, lease):
+            call_command(task.get("command", name), stdout=out, stderr=out, **task.get("options", {}))
+        error = ""
+        logger.info("%s finished in %.1fs", name, time.monotonic() - started)
+    except Exception as e:
+        error = str(e)
+        logger.exception("%s failed", name)
+    # Hand the lease over to the schedule: nobody runs it again before start + interval
+    SchedulerLock.objects.filter(name=name, owner=OWNER).update(
+        locked_until=max(started_at + timedelta(seconds=task["interval"]), now()),
+        last_error=error,
+    )
+
+
+def run_due_tasks():
+    lease = getattr(settings, "SCHEDULER_LEASE", 300)
+    for name, task in settings.SCHEDULED_COMMANDS.items():
+        if try_acquire(name, lease):
+            run_task(name, task, lease)
+
+
+def _loop(tick):
+    while True:
+        close_old_connections()
+        try:
+            run_due_tasks()
+        except Exception:
+            # A DB hiccup must not kill the thread for the lifetime of the worker
+            logger.exception("Scheduler tick failed")
+        finally:
+            connection.close()
+        time.sleep(tick)
+
+
+def start():
+    """Start the scheduler thread once per process, if enabled."""
+    global _started
+    if not getattr(settings, "SCHEDULER_ENABLED", False) or not settings.SCHEDULED_COMMANDS:
+        return
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+    tick = getattr(settings, "SCHEDULER_TICK", 60)
+    threading.Thread(target=_loop, args=(tick,), name="dashboard-scheduler", daemon=True).start()
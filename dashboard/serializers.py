@@ -1,26 +1,29 @@
 from rest_framework import serializers
 from .models import Machine
-from django.utils.timezone import now
+from django.utils.timezone import localdate, now
 
 
  
-from .models import Machine, InspectionReport 
+from .models import Machine, InspectionReport, CheckPendingJob, PendingInspection
 from rest_framework.serializers import ModelSerializer, CharField, BooleanField, ValidationError
+from llf_backend.fieldsets import SparseFieldsMixin
 
 
-class MachineSerializer(serializers.ModelSerializer):
+class MachineSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     engineer_name = serializers.CharField(source="engineer.username", read_only=True)
     worker_name = serializers.CharField(source="worker.username", read_only=True)
+    compact_fields = ("id", "name", "location", "status", "next_due_date")
 
     class Meta:
         model = Machine
         fields = '__all__'
 
 
-class MachineWithDueDateSerializer(serializers.ModelSerializer):
+class MachineWithDueDateSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     engineer_name = serializers.CharField(source="engineer.username", read_only=True)
     worker_name = serializers.CharField(source="worker.username", read_only=True)
     due_date = serializers.SerializerMethodField()
+    compact_fields = ("id", "name", "location", "due_date")
 
     class Meta:
         model = Machine
@@ -28,7 +31,9 @@ class MachineWithDueDateSerializer(serializers.ModelSerializer):
         extra_fields = ['engineer_name', 'worker_name', 'due_date']
 
     def get_due_date(self, obj):
-        # This reads from context if passed, else returns today
+        # Per-object due date (pending lists), else the one from context, else today
+        if getattr(obj, "pending_due_date", None) is not None:
+            return obj.pending_due_date
         return self.context.get("due_date", now().date())
         # return getattr(obj, 'due_date', None)  
 
@@ -70,3 +75,48 @@ class InspectionReportSerializer(serializers.ModelSerializer):
             'sound_comment',
             'is_escalated'
              ]
+        # (machine, due_date) is unique in the database; the views catch the
+        # IntegrityError instead of paying for a pre-check query here
+        validators = []
+
+
+class BatchInspectionItemSerializer(serializers.Serializer):
+    """One entry of a batch submission; machine and assignment are checked for the whole batch at once."""
+    machine = serializers.IntegerField()
+    due_date = serializers.DateField(input_formats=['%Y-%m-%d'])
+    look = serializers.BooleanField(default=True)
+    feel = serializers.BooleanField(default=True)
+    sound = serializers.BooleanField(default=True)
+    look_comment = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    feel_comment = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    sound_comment = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+
+    def validate_due_date(self, value):
+        if value > localdate():
+            raise ValidationError("Due date cannot be in the future.")
+        return value
+
+
+class PendingInspectionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PendingInspection
+        fields = ['id', 'machine', 'date_due', 'resolved', 'created_at', 'updated_at']
+
+
+class CheckPendingJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CheckPendingJob
+        fields = [
+            'id',
+            'status',
+            'options',
+            'days_done',
+            'days_total',
+            'pendings_created',
+            'output',
+            'result',
+            'error',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
@@ -0,0 +1,71 @@
+"""
+Drop cached dashboard summaries of the users a write affects (see
+summary_cache), and record the tombstones delta sync needs (see sync).
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from authentication.models import CustomUser
+from .models import Escalation, InspectionReport, Machine, PendingInspection, Tombstone
+from .occurrences import refresh_machine
+from .summary_cache import invalidate_users
+
+
+@receiver([post_save, post_delete], sender=Machine)
+def machine_changed(sender, instance, **kwargs):
+    # _loaded_worker_id: the previous worker loses the machine on reassignment
+    users = [instance.engineer_id, instance.worker_id, getattr(instance, "_loaded_worker_id", None)]
+    # After commit, so a concurrent rebuild can't cache the pre-write state under the new version
+    transaction.on_commit(lambda: invalidate_users(users))
+
+
+@receiver(post_save, sender=Machine)
+def machine_schedule_changed(sender, instance, created, **kwargs):
+    # Keep the DueOccurrence rows (schedule view, heatmap) in step with the new rule
+    if created or instance.schedule_changed():
+        refresh_machine(instance)
+
+
+@receiver([post_save, post_delete], sender=InspectionReport)
+@receiver([post_save, post_delete], sender=PendingInspection)
+@receiver([post_save, post_delete], sender=Escalation)
+def machine_activity_changed(sender, instance, **kwargs):
+    users = Machine.objects.filter(id=instance.machine_id).values_list("engineer_id", "worker_id").first()
+    if users:
+        transaction.on_commit(lambda: invalidate_users(users))
+
+
+@receiver(post_save, sender=Machine)
+def machine_reassigned(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_loaded_worker_id", None)
+    if created or previous == instance.worker_id:
+        return
+    if previous is not None:
+        Tombstone.objects.create(
+            kind=Tombstone.Kind.MACHINE, object_id=instance.id, reason=Tombstone.Reason.UNASSIGNED,
+            engineer_id=instance.engineer_id, worker_id=previous,
+        )
+    if instance.worker_id is not None:
+        # Re-stamp the open pendings so the new worker's devices pull them on their next sync
+        PendingInspection.objects.filter(machine=instance, resolved=False).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Machine)
+def machine_deleted(sender, instance, **kwargs):
+    Tombstone.objects.create(
+        kind=Tombstone.Kind.MACHINE, object_id=instance.id,
+        engineer_id=instance.engineer_id, worker_id=instance.worker_id,
+    )
+
+
+@receiver(pre_delete, sender=CustomUser)
+def user_deleting(sender, instance, **kwargs):
+    # worker is SET_NULL with a plain UPDATE, which wouldn't touch updated_at
+    Machine.objects.filter(worker=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=CustomUser)
+def user_deleted(sender, instance, **kwargs):
+    Tombstone.objects.create(kind=Tombstone.Kind.USER, object_id=instance.id, engineer_id=instance.created_by_id)
@@ -0,0 +1,73 @@
+"""
+Per-user cache of the dashboard-summary payload.
+
+Keys embed the day (the due count changes at midnight), a per-user version
+and a global generation. Invalidating bumps a version instead of deleting
+the entry, so a rebuild that raced with a write lands on a key nobody reads
+anymore. Signal handlers in dashboard/signals.py bump the versions of the
+users a write affects; bulk writes that bypass signals bump the generation.
+
+Stampede protection: an entry is served fresh for DASHBOARD_SUMMARY_TTL
+seconds and kept for a grace period after that. Only the request that wins
+``cache.add`` on the rebuild lock recomputes; the others get the stale entry,
+or wait briefly for the winner when there is none.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import localdate
+
+SUMMARY_TTL = getattr(settings, "DASHBOARD_SUMMARY_TTL", 60)
+STALE_GRACE = 60
+LOCK_TTL = 30
+LOCK_WAIT = 2.0
+
+GENERATION_KEY = "dashboard-summary:generation"
+
+
+def _version_key(user_id):
+    return f"dashboard-summary:version:{user_id}"
+
+
+def summary_key(user_id):
+    versions = cache.get_many([GENERATION_KEY, _version_key(user_id)])
+    return (
+        f"dashboard-summary:{versions.get(GENERATION_KEY, 0)}:{user_id}:"
+        f"{versions.get(_version_key(user_id), 0)}:{localdate()}"
+    )
+
+
+def invalidate_users(user_ids):
+    version = time.time_ns()
+    cache.set_many({_version_key(user_id): version for user_id in set(user_ids) if user_id}, None)
+
+
+def invalidate_all():
+    cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def get_summary(user, build):
+    """Cached ``build()`` for ``user``; ``build`` must return a picklable payload."""
+    key = summary_key(user.id)
+    entry = cache.get(key)
+    if entry is not None and entry["fresh_until"] > time.time():
+        return entry["data"]
+
+    if not cache.add(f"{key}:lock", True, LOCK_TTL):
+        # Someone else is rebuilding: serve what we have, or wait for theirs
+        if entry is not None:
+            return entry["data"]
+        deadline = time.time() + LOCK_WAIT
+        while time.time() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry["data"]
+
+    try:
+        data = build()
+        cache.set(key, {"data": data, "fresh_until": time.time() + SUMMARY_TTL}, SUMMARY_TTL + STALE_GRACE)
+    finally:
+        cache.delete(f"{key}:lock")
+    return data
@@ -0,0 +1,120 @@
+"""
+Delta sync for offline devices (SyncView).
+
+A sync token holds the user and the time the previous sync started. Given a
+token, ``changes()`` returns only the machines, open and newly resolved
+pendings and inspection reports whose updated_at is later, plus the ids of
+machines and users that left the user's scope since (Tombstone). Without a
+token, or with one older than the tombstones we keep, it answers with a full
+snapshot and ``"full": True``; the device replaces its store.
+
+Rows are upserts keyed by id, so reading a little before the token
+(OVERLAP) is harmless and covers writes whose transaction committed after
+the previous sync read past them. Reports and pendings are only deleted along
+with their machine or worker; devices drop them with it.
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils.timezone import now
+from rest_framework.exceptions import ValidationError
+
+from .models import InspectionReport, Machine, PendingInspection, Tombstone
+from .serializers import InspectionReportSerializer, MachineSerializer, PendingInspectionSerializer
+
+OVERLAP = timedelta(seconds=60)
+
+
+def encode_token(user, at):
+    payload = json.dumps({"user": user.pk, "at": at.isoformat()})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_token(user, token):
+    """The ``since`` time of ``token``, or None when a full sync is needed."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+        since = datetime.fromisoformat(payload["at"])
+    except (ValueError, TypeError, KeyError):
+        raise ValidationError({"token": "Invalid sync token."})
+    if payload.get("user") != user.pk:
+        return None  # device changed hands; start over
+    if since < now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS):
+        return None  # tombstones since then may be pruned
+    return since - OVERLAP
+
+
+def machine_scope(user):
+    machines = Machine.objects.all()
+    if user.user_type == "worker":
+        return machines.filter(worker=user)
+    if user.user_type == "engineer":
+        return machines.filter(engineer=user)
+    if user.user_type == "admin":
+        return machines
+    return machines.none()
+
+
+def report_scope(user):
+    reports = InspectionReport.objects.all()
+    if user.user_type == "worker":
+        return reports.filter(worker=user)
+    if user.user_type == "engineer":
+        return reports.filter(machine__engineer=user)
+    if user.user_type == "admin":
+        return reports
+    return reports.none()
+
+
+def tombstone_scope(user):
+    tombstones = Tombstone.objects.all()
+    if user.user_type == "worker":
+        return tombstones.filter(worker_id=user.pk)
+    # Reassignments don't take machines away from engineers and admins
+    deleted = tombstones.filter(reason=Tombstone.Reason.DELETED)
+    if user.user_type == "engineer":
+        return deleted.filter(engineer_id=user.pk)
+    if user.user_type == "admin":
+        return deleted
+    return tombstones.none()
+
+
+def changes(user, token=None):
+    started_at = now()
+    since = decode_token(user, token) if token else None
+
+    machines = machine_scope(user)
+    pendings = PendingInspection.objects.filter(machine__in=machines.values("id"))
+    reports = report_scope(user)
+    if since is None:
+        pendings = pendings.filter(resolved=False)
+        reports = reports.filter(timestamp__gte=started_at - timedelta(days=settings.SYNC_REPORT_DAYS))
+        deleted = Tombstone.objects.none()
+    else:
+        machines = machines.filter(updated_at__gt=since)
+        # resolved ones included, so devices can drop them
+        pendings = pendings.filter(updated_at__gt=since)
+        reports = reports.filter(updated_at__gt=since)
+        deleted = tombstone_scope(user).filter(created_at__gt=since)
+
+    machine_data = MachineSerializer(machines.select_related("engineer", "worker"), many=True).data
+    # A machine reassigned away and back again since the token is an upsert, not a delete
+    present = {machine["id"] for machine in machine_data}
+    deleted_ids = {Tombstone.Kind.MACHINE: set(), Tombstone.Kind.USER: set()}
+    for kind, object_id in deleted.values_list("kind", "object_id"):
+        if not (kind == Tombstone.Kind.MACHINE and object_id in present):
+            deleted_ids[kind].add(object_id)
+
+    return {
+        "token": encode_token(user, started_at),
+        "full": since is None,
+        "machines": machine_data,
+        "pending_inspections": PendingInspectionSerializer(pendings, many=True).data,
+        "reports": InspectionReportSerializer(reports, many=True).data,
+        "deleted": {
+            "machines": sorted(deleted_ids[Tombstone.Kind.MACHINE]),
+            "users": sorted(deleted_ids[Tombstone.Kind.USER]),
+        },
+    }
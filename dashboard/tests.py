@@ -1,3 +1,1148 @@
-from django.test import TestCase
+import base64
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.timezone import localdate, now
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from authentication.models import CustomUser
+from llf_backend.renderers import FastJSONRenderer
+from . import idempotency, jobs, pending, scheduler, summary_cache
+from .latency import PERCENTILES, group_percentiles
+from .models import (
+    CheckPendingJob, CommandCheckpoint, ComplianceRollup, DueOccurrence, Escalation, IdempotencyKey, InspectionReport, Machine, PendingInspection, SchedulerLock,
+)
+from .recurrence import (
+    FREQUENCY_RULES, WEEKDAYS, as_dates, current_period, machine_anchor, machine_rule, next_due_after, next_occurrence,
+    occurrences, parse_rule, previous_occurrence, rule_for,
+)
+from .views import MachineScheduleView
+
+FREQUENCIES = ["daily", "weekly", "monthly"]
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Every read endpoint must run a fixed number of queries, whatever the size
+    of the fleet. The fixture is large enough that any per-row query would
+    blow the budget by hundreds.
+    """
+    MACHINES = 150
+    REPORTS = 600
+
+    @classmethod
+    def setUpTestData(cls):
+        today = localdate()
+        cls.admin = CustomUser.objects.create_user(email="admin@example.com", username="admin", password="x", user_type="admin")
+        cls.engineer = CustomUser.objects.create_user(email="eng@example.com", username="eng", password="x", user_type="engineer")
+        cls.workers = [
+            CustomUser.objects.create_user(worker_id=f"w{i}", username=f"w{i}", password="x", user_type="worker", created_by=cls.engineer)
+            for i in range(5)
+        ]
+        cls.worker = cls.workers[0]
+
+        Machine.objects.bulk_create([
+            Machine(
+                name=f"m{i}",
+                engineer=cls.engineer,
+                worker=cls.workers[i % 5] if i % 4 else None,
+                inspection_frequency=FREQUENCIES[i % 3],
+                location=f"Floor {i % 6}",
+            )
+            for i in range(cls.MACHINES)
+        ])
+        Machine.objects.update(created_at=now() - timedelta(days=90))
+        machines = list(Machine.objects.order_by("id"))
+        cls.machine = next(m for m in machines if m.worker_id == cls.worker.id)
+
+        InspectionReport.objects.bulk_create([
+            InspectionReport(
+                machine=machines[i % cls.MACHINES],
+                worker=cls.workers[i % 5],
+                due_date=today - timedelta(days=i % 30 + i // cls.MACHINES + 1),  # one per machine and day
+                is_escalated=i % 7 == 0,
+            )
+            for i in range(cls.REPORTS)
+        ])
+        PendingInspection.objects.bulk_create([
+            PendingInspection(machine=machines[i % cls.MACHINES], date_due=today - timedelta(days=i // cls.MACHINES + 61))
+            for i in range(300)
+        ])
+        Escalation.objects.bulk_create([
+            Escalation(machine=report.machine, worker=report.worker, engineer=cls.engineer, report=report, comment="check")
+            for report in InspectionReport.objects.filter(is_escalated=True).select_related("machine", "worker")[:40]
+        ])
+        call_command("rebuild_due_columns", verbosity=0, stdout=StringIO())
+        call_command("generate_due_occurrences", stdout=StringIO())
+        call_command("rollup_compliance", stdout=StringIO())
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def assertBudget(self, user, url, queries):
+        self.client.force_authenticate(user)
+        if queries is None:
+            response = self.client.get(url)
+        else:
+            with self.assertNumQueries(queries):
+                response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content[:200])
+        return response
+
+    def test_machine_lists(self):
+        self.assertBudget(self.admin, "/api/dashboard/machines/", 2)
+        self.assertBudget(self.engineer, "/api/dashboard/machines/", 2)
+        self.assertBudget(self.worker, "/api/dashboard/machines/", 2)
+        self.assertBudget(self.admin, "/api/dashboard/machines/?page_size=20", 2)
+        self.assertBudget(self.engineer, "/api/dashboard/machines/engineer/", 4)
+        self.assertBudget(self.engineer, "/api/dashboard/machines/engineer/?page_size=20", 4)
+
+    def test_sparse_fieldsets(self):
+        response = self.assertBudget(self.admin, "/api/dashboard/machines/?fields=id,name,location", 2)
+        self.assertEqual(set(response.data[0]), {"id", "name", "location"})
+        response = self.assertBudget(self.worker, "/api/dashboard/worker/due-machine-list/?type=pending&compact=1", 1)
+        self.assertEqual(set(response.data[0]), {"id", "name", "location", "due_date"})
+
+    def test_fast_read_path_matches_serializers(self):
+        urls = [
+            (self.admin, "/api/dashboard/machines/"),
+            (self.engineer, "/api/dashboard/machines/engineer/?page_size=20"),
+            (self.admin, "/api/users/?page_size=3"),
+        ] + [
+            (self.worker, f"/api/dashboard/worker/due-machine-list/?type={view_type}&exclude=created_at")
+            for view_type in ("due_today", "pending", "escalated")
+        ]
+        for user, url in urls:
+            with self.subTest(url=url):
+                self.client.force_authenticate(user)
+                with self.settings(FAST_READ_PATH=False):
+                    expected = self.client.get(url, HTTP_ACCEPT="application/json")
+                self.assertIs(type(expected.accepted_renderer), JSONRenderer)
+                with self.settings(FAST_READ_PATH=True):
+                    response = self.client.get(url, HTTP_ACCEPT="application/json")
+                self.assertIsInstance(response.accepted_renderer, FastJSONRenderer)
+                self.assertEqual(response.content, expected.content)
+
+    def test_conditional_get(self):
+        urls = [
+            (self.engineer, "/api/dashboard/machines/", 1),
+            (self.engineer, "/api/dashboard/machines/engineer/", 1),
+            (self.engineer, f"/api/dashboard/machines/{self.machine.id}/", 1),
+            (self.engineer, f"/api/dashboard/machines/{self.machine.id}/schedule/", 1),
+        ]
+        for user, url, queries in urls:
+            with self.subTest(url=url):
+                etag = self.assertBudget(user, url, None)["ETag"]
+                with self.assertNumQueries(queries):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b"")
+
+        since = (localdate() - timedelta(days=70)).strftime("%Y-%m")
+        schedule = f"/api/dashboard/machines/{self.machine.id}/schedule/?from={since}&to={localdate():%Y-%m}"
+        etag = self.client.get(schedule)["ETag"]
+        PendingInspection.objects.filter(machine=self.machine, resolved=False).first().delete()
+        self.assertEqual(self.client.get(schedule, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        detail = f"/api/dashboard/machines/{self.machine.id}/"
+        modified = self.client.get(detail)["Last-Modified"]
+        self.assertEqual(self.client.get(detail, HTTP_IF_MODIFIED_SINCE=modified).status_code, 304)
+
+        etag = self.client.get("/api/dashboard/machines/")["ETag"]
+        machine = Machine.objects.get(id=self.machine.id)
+        machine.location = "Floor 9"
+        machine.save(update_fields=["location"])
+        self.assertEqual(self.client.get("/api/dashboard/machines/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_renaming_a_user_changes_machine_etags(self):
+        urls = ["/api/dashboard/machines/", "/api/dashboard/machines/engineer/", f"/api/dashboard/machines/{self.machine.id}/"]
+        self.client.force_authenticate(self.engineer)
+        etags = {url: self.client.get(url)["ETag"] for url in urls}
+        for user in (self.worker, self.engineer):
+            user.username += "-renamed"
+            user.save()
+            for url in urls:
+                with self.subTest(user=user.username, url=url):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                    self.assertEqual(response.status_code, 200)
+                    self.assertIn(user.username.encode(), response.content)
+                    etags[url] = response["ETag"]
+
+    def test_machine_detail_and_schedule(self):
+        self.assertBudget(self.engineer, f"/api/dashboard/machines/{self.machine.id}/", 1)
+        self.assertBudget(self.engineer, f"/api/dashboard/machines/{self.machine.id}/schedule/", 3)
+        self.assertBudget(self.engineer, f"/api/dashboard/machines/{self.machine.id}/schedule/?from=2025-01&to=2025-12", 3)
+
+    def test_dashboard_summary(self):
+        # custom-rule machines, then the aggregate
+        self.assertBudget(self.engineer, "/api/dashboard/dashboard-summary/", 2)
+        self.assertBudget(self.worker, "/api/dashboard/dashboard-summary/", 2)
+        self.assertBudget(self.worker, "/api/dashboard/dashboard-summary/", 0)  # cached
+
+    def test_worker_due_lists(self):
+        for view_type, queries in (("due_today", 2), ("pending", 1), ("escalated", 2)):
+            with self.subTest(view_type=view_type):
+                self.assertBudget(self.worker, f"/api/dashboard/worker/due-machine-list/?type={view_type}", queries)
+                self.assertBudget(self.worker, f"/api/dashboard/worker/due-machine-list/?type={view_type}&page_size=5", queries)
+
+    def test_engineer_analytics(self):
+        self.assertBudget(self.engineer, "/api/dashboard/engineer/machine-analytics/", 1)
+        self.assertBudget(self.engineer, "/api/dashboard/engineer/heatmap/", 4)
+        self.assertBudget(self.engineer, "/api/dashboard/engineer/compliance/?period=week&group_by=location", 1)
+        self.assertBudget(self.engineer, "/api/dashboard/engineer/latency/", 1)
+
+
+class RecurrenceTests(SimpleTestCase):
+    """Rules expanded against known calendars."""
+
+    def dates(self, text, start, end, anchor=None):
+        return as_dates(occurrences(parse_rule(text), start, end, anchor))
+
+    def test_expansion(self):
+        self.assertEqual(
+            self.dates("FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH", date(2026, 1, 1), date(2026, 1, 31), anchor=date(2026, 1, 1)),
+            [date(2026, 1, 1), date(2026, 1, 12), date(2026, 1, 15), date(2026, 1, 26), date(2026, 1, 29)],
+        )
+        self.assertEqual(
+            self.dates("FREQ=DAILY;INTERVAL=3", date(2026, 1, 25), date(2026, 2, 8), anchor=date(2026, 1, 30)),
+            [date(2026, 1, 30), date(2026, 2, 2), date(2026, 2, 5), date(2026, 2, 8)],
+        )
+        self.assertEqual(  # leap February
+            self.dates("FREQ=MONTHLY;BYMONTHDAY=1,15,-1", date(2028, 2, 1), date(2028, 2, 29)),
+            [date(2028, 2, 1), date(2028, 2, 15), date(2028, 2, 29)],
+        )
+        self.assertEqual(
+            self.dates("FREQ=MONTHLY;INTERVAL=2;BYMONTHDAY=-1", date(2026, 1, 1), date(2026, 6, 30), anchor=date(2026, 1, 10)),
+            [date(2026, 1, 31), date(2026, 3, 31), date(2026, 5, 31)],
+        )
+        self.assertEqual(
+            self.dates("FREQ=MONTHLY;BYMONTHDAY=13;BYDAY=FR", date(2001, 1, 1), date(2002, 12, 31)),
+            [date(2001, 4, 13), date(2001, 7, 13), date(2002, 9, 13), date(2002, 12, 13)],
+        )
+        self.assertEqual(self.dates(FREQUENCY_RULES["weekly"], date(2026, 10, 1), date(2026, 10, 18)), [date(2026, 10, 3), date(2026, 10, 10), date(2026, 10, 17)])
+        self.assertEqual(self.dates(FREQUENCY_RULES["monthly"], date(2026, 1, 1), date(2026, 3, 31)), [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31)])
+
+    def test_long_gaps_are_found(self):
+        friday_13th = parse_rule("FREQ=MONTHLY;BYMONTHDAY=13;BYDAY=FR")
+        # Fourteen months without one
+        self.assertEqual(next_occurrence(friday_13th, date(2001, 7, 14)), date(2002, 9, 13))
+        self.assertEqual(previous_occurrence(friday_13th, date(2002, 9, 13)), date(2001, 7, 13))
+        self.assertEqual(current_period(friday_13th, date(2002, 9, 13)), date(2001, 7, 14))
+        self.assertEqual(next_due_after(friday_13th, date(2001, 7, 13), date(2001, 1, 1)), date(2002, 9, 13))
+        # April has no 31st, and with INTERVAL=12 every due month is an April
+        self.assertIsNone(next_occurrence(parse_rule("FREQ=MONTHLY;INTERVAL=12;BYMONTHDAY=31"), date(2026, 5, 1), date(2026, 4, 1)))
+
+    def test_next_due_after(self):
+        weekly = rule_for("weekly")
+        created = date(2026, 10, 1)  # a Thursday
+        self.assertEqual(next_due_after(weekly, None, created), date(2026, 10, 3))
+        self.assertEqual(next_due_after(weekly, date(2026, 10, 3), created), date(2026, 10, 10))
+        # Inspected early: the Monday inspection covers that week's Saturday
+        self.assertEqual(next_due_after(weekly, date(2026, 10, 5), created), date(2026, 10, 17))
+        every_other_day = parse_rule("FREQ=DAILY;INTERVAL=2")
+        self.assertEqual(next_due_after(every_other_day, date(2026, 10, 2), created), date(2026, 10, 5))
+
+    def test_current_period(self):
+        weekly = rule_for("weekly")
+        self.assertEqual(current_period(weekly, date(2026, 10, 10)), date(2026, 10, 4))
+        self.assertIsNone(current_period(weekly, date(2026, 10, 9)))
+        self.assertEqual(current_period(weekly, date(2026, 10, 10), date(2026, 10, 8)), date(2026, 10, 8))
+        self.assertIsNone(current_period(weekly, date(2026, 10, 10), date(2026, 10, 11)))
+        fortnightly = parse_rule("FREQ=WEEKLY;INTERVAL=2;BYDAY=SA")
+        self.assertEqual(current_period(fortnightly, date(2026, 1, 17), date(2025, 12, 1)), date(2026, 1, 4))
+        self.assertIsNone(current_period(fortnightly, date(2026, 1, 10), date(2025, 12, 1)))
+
+
+class MachineScheduleTests(TestCase):
+    def test_weeks_without_a_due_date_are_left_out(self):
+        engineer = CustomUser.objects.create_user(email="eng@example.com", username="eng", password="x", user_type="engineer")
+        machine = Machine.objects.create(
+            name="press", engineer=engineer, recurrence_rule="FREQ=WEEKLY;INTERVAL=2;BYDAY=SA", location="Floor 1",
+        )
+        Machine.objects.filter(id=machine.id).update(created_at=timezone.make_aware(datetime(2025, 12, 1, 9)))
+        InspectionReport.objects.create(machine=machine, worker=engineer, due_date=date(2026, 1, 15))
+
+        client = APIClient()
+        client.force_authenticate(engineer)
+        response = client.get(f"/api/dashboard/machines/{machine.id}/schedule/?year=2026&month=1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [
+            {"schedule": "Week 1 (Jan 1-7)", "status": "missed"},
+            {"schedule": "Week 3 (Jan 15-21)", "status": "completed"},
+            {"schedule": "Week 5 (Jan 29-31)", "status": "missed"},
+        ])
+
+
+class DueOccurrenceTests(TestCase):
+    def setUp(self):
+        self.today = localdate()
+        self.engineer = CustomUser.objects.create_user(email="eng@example.com", username="eng", password="x", user_type="engineer")
+        self.machine = Machine.objects.create(name="press", engineer=self.engineer, inspection_frequency="weekly", location="Floor 1")
+        Machine.objects.filter(id=self.machine.id).update(created_at=now() - timedelta(days=30))
+        self.machine.refresh_from_db()
+        self.saturdays = as_dates(occurrences(
+            rule_for("weekly"), self.today - timedelta(days=30), self.today + timedelta(days=14), machine_anchor(self.machine)
+        ))
+        self.past = [day for day in self.saturdays if day < self.today]
+        InspectionReport.objects.create(machine=self.machine, worker=self.engineer, due_date=self.past[0])
+        PendingInspection.objects.create(machine=self.machine, date_due=self.past[1])
+
+    def generate(self, **options):
+        call_command("generate_due_occurrences", horizon=14, stdout=StringIO(), **options)
+        return dict(DueOccurrence.objects.filter(machine=self.machine).values_list("due_date", "status"))
+
+    def test_generation_classifies_each_due_date(self):
+        expected = {day: DueOccurrence.Status.MISSED for day in self.past}
+        expected.update({day: DueOccurrence.Status.SCHEDULED for day in self.saturdays if day >= self.today})
+        expected[self.past[0]] = DueOccurrence.Status.COMPLETED
+        expected[self.past[1]] = DueOccurrence.Status.PENDING
+        self.assertEqual(self.generate(), expected)
+        self.assertEqual(CommandCheckpoint.objects.get(name="due_occurrences").last_date, self.today + timedelta(days=14))
+
+    def test_schedule_change_rebuilds_the_future(self):
+        self.generate()
+        self.machine.inspection_frequency = "daily"
+        self.machine.save()  # the post_save signal regenerates up to the last horizon
+
+        rows = dict(DueOccurrence.objects.filter(machine=self.machine).values_list("due_date", "status"))
+        future = sorted(day for day in rows if day >= self.today)
+        self.assertEqual(future, [self.today + timedelta(days=n) for n in range(15)])
+        self.assertEqual(rows[self.past[0]], DueOccurrence.Status.COMPLETED)
+        self.assertEqual(rows[self.today - timedelta(days=1)], DueOccurrence.Status.MISSED)
+
+    def test_incremental_run_rolls_the_horizon_and_adds_new_machines(self):
+        self.generate()
+        CommandCheckpoint.objects.filter(name="due_occurrences").update(last_date=self.today + timedelta(days=7))
+        DueOccurrence.objects.filter(due_date__gt=self.today + timedelta(days=7)).delete()
+        newcomer = Machine.objects.create(name="lathe", engineer=self.engineer, inspection_frequency="daily", location="Floor 2")
+
+        rows = self.generate()
+        self.assertEqual(sorted(day for day in rows if day >= self.today), [day for day in self.saturdays if day >= self.today])
+        self.assertEqual(
+            sorted(DueOccurrence.objects.filter(machine=newcomer).values_list("due_date", flat=True)),
+            [self.today + timedelta(days=n) for n in range(15)],
+        )
+
+
+class ComplianceRollupTests(TestCase):
+    def setUp(self):
+        today = localdate()
+        self.days = [today - timedelta(days=3), today - timedelta(days=2)]
+        self.engineer = CustomUser.objects.create_user(email="eng@example.com", username="eng", password="x", user_type="engineer")
+        other = CustomUser.objects.create_user(email="other@example.com", username="other", password="x", user_type="engineer")
+        press = Machine.objects.create(name="press", engineer=self.engineer, inspection_frequency="daily", location="Floor 1")
+        self.lathe = Machine.objects.create(name="lathe", engineer=self.engineer, inspection_frequency="weekly", location="Floor 2")
+        drill = Machine.objects.create(name="drill", engineer=other, inspection_frequency="daily", location="Floor 1")
+        InspectionReport.objects.create(machine=press, worker=self.engineer, due_date=self.days[0], look=False, is_escalated=True)
+
+        Status = DueOccurrence.Status
+        DueOccurrence.objects.bulk_create([
+            DueOccurrence(machine=press, due_date=self.days[0], status=Status.COMPLETED),
+            DueOccurrence(machine=press, due_date=self.days[1], status=Status.MISSED),
+            DueOccurrence(machine=self.lathe, due_date=self.days[0], status=Status.PENDING),
+            DueOccurrence(machine=self.lathe, due_date=self.days[1], status=Status.SCHEDULED),  # counts as missed
+            DueOccurrence(machine=drill, due_date=self.days[0], status=Status.COMPLETED),
+        ])
+        call_command("rollup_compliance", stdout=StringIO())
+        self.client = APIClient()
+        self.client.force_authenticate(self.engineer)
+
+    def counts(self):
+        return {
+            (row.date, row.location): (row.due, row.completed, row.pending, row.missed, row.escalated)
+            for row in ComplianceRollup.objects.filter(engineer=self.engineer)
+        }
+
+    def test_rows_per_day_location_and_frequency(self):
+        self.assertEqual(self.counts(), {
+            (self.days[0], "Floor 1"): (1, 1, 0, 0, 1),
+            (self.days[0], "Floor 2"): (1, 0, 1, 0, 0),
+            (self.days[1], "Floor 1"): (1, 0, 0, 1, 0),
+            (self.days[1], "Floor 2"): (1, 0, 0, 1, 0),
+        })
+        self.assertEqual(ComplianceRollup.objects.exclude(engineer=self.engineer).count(), 1)
+        self.assertEqual(CommandCheckpoint.objects.get(name="compliance_rollup").last_date, localdate() - timedelta(days=1))
+
+    def test_rerun_replaces_the_lookback_window(self):
+        DueOccurrence.objects.filter(machine=self.lathe, due_date=self.days[1]).update(status=DueOccurrence.Status.COMPLETED)
+        call_command("rollup_compliance", stdout=StringIO())
+        self.assertEqual(self.counts()[self.days[1], "Floor 2"], (1, 1, 0, 0, 0))
+        self.assertEqual(ComplianceRollup.objects.count(), 5)
+
+    def test_series_by_day_week_and_group(self):
+        url = "/api/dashboard/engineer/compliance/"
+        series = self.client.get(url, {"start": self.days[0], "end": self.days[1]}).data["series"]
+        self.assertEqual(
+            [(entry["date"], entry["due"], entry["completed"], entry["completion_rate"]) for entry in series],
+            [(self.days[0], 2, 1, 0.5), (self.days[1], 2, 0, 0.0)],
+        )
+
+        weeks = {}
+        for day, due in ((self.days[0], 2), (self.days[1], 2)):
+            monday = day - timedelta(days=day.weekday())
+            weeks[monday] = weeks.get(monday, 0) + due
+        series = self.client.get(url, {"start": self.days[0], "end": self.days[1], "period": "week"}).data["series"]
+        self.assertEqual({entry["date"]: entry["due"] for entry in series}, weeks)
+
+        series = self.client.get(url, {"start": self.days[0], "end": self.days[0], "group_by": "location"}).data["series"]
+        self.assertEqual({entry["location"]: entry["escalated"] for entry in series}, {"Floor 1": 1, "Floor 2": 0})
+        self.assertEqual(self.client.get(url, {"period": "month"}).status_code, 400)
+
+
+class LatencyTests(TestCase):
+    def test_group_percentiles_match_numpy(self):
+        rng = np.random.default_rng(7)
+        keys = rng.integers(0, 9, size=500)
+        values = rng.normal(12, 20, size=500)
+        unique_keys, counts, table = group_percentiles(keys, values)
+        for key, count, row in zip(unique_keys, counts, table):
+            self.assertEqual(count, (keys == key).sum())
+            np.testing.assert_allclose(row, np.percentile(values[keys == key], PERCENTILES))
+
+    def test_report_endpoint(self):
+        today = localdate()
+        engineer = CustomUser.objects.create_user(email="eng@example.com", username="eng", password="x", user_type="engineer")
+        workers = [
+            CustomUser.objects.create_user(email=f"w{i}@example.com", username=f"w{i}", password="x", user_type="worker")
+            for i in range(2)
+        ]
+        press = Machine.objects.create(name="press", engineer=engineer, inspection_frequency="daily", location="Floor 1")
+        lathe = Machine.objects.create(name="lathe", engineer=engineer, inspection_frequency="daily", location="Floor 2")
+        hours = {(press, workers[0]): [2, 10, 30], (lathe, workers[1]): [5, -3]}
+        report_days = {}
+        for (machine, worker), latencies in hours.items():
+            for n, latency in enumerate(latencies):
+                due_date = today - timedelta(days=5 + n)
+                report = InspectionReport.objects.create(machine=machine, worker=worker, due_date=due_date)
+                midnight = timezone.make_aware(datetime.combine(due_date, datetime.min.time()))
+                InspectionReport.objects.filter(id=report.id).update(timestamp=midnight + timedelta(hours=latency))
+                day = due_date + timedelta(days=latency // 24)
+                report_days.setdefault(worker.id, []).append(day)
+
+        client = APIClient()
+        client.force_authenticate(engineer)
+        data = client.get("/api/dashboard/engineer/latency/").data
+        self.assertEqual(data["count"], 5)
+        self.assertEqual(data["overall"], {f"p{p}": round(float(np.percentile([2, 10, 30, 5, -3], p)), 2) for p in PERCENTILES})
+        by_worker = {row["key"]: row for row in data["by_worker"]}
+        for (machine, worker), latencies in hours.items():
+            self.assertEqual(by_worker[worker.id]["count"], len(latencies))
+            self.assertEqual(by_worker[worker.id]["p50"], round(float(np.median(latencies)), 2))
+        self.assertEqual([row["key"] for row in data["by_location"]], ["Floor 1", "Floor 2"])
+
+        throughput = data["throughput"]
+        for worker_id, counts in zip(throughput["workers"], throughput["counts"]):
+            expected = [report_days[worker_id].count(date.fromisoformat(day)) for day in throughput["dates"]]
+            self.assertEqual(counts, expected)
+
+
+class HeatmapTests(TestCase):
+    def test_bits_match_the_schedule_status_of_each_date(self):
+        today = localdate()
+        engineer = CustomUser.objects.create_user(email="eng@example.com", username="eng", password="x", user_type="engineer")
+        machines = [
+            Machine.objects.create(name=f"m{i}", engineer=engineer, inspection_frequency=FREQUENCIES[i % 3], location="Floor 1")
+            for i in range(6)
+        ]
+        machines.append(Machine.objects.create(name="custom", engineer=engineer, recurrence_rule="FREQ=DAILY;INTERVAL=3", location="Floor 1"))
+        Machine.objects.filter(id__in=[m.id for m in machines[:4]]).update(created_at=now() - timedelta(days=60))
+        Machine.objects.filter(id__in=[m.id for m in machines[4:]]).update(created_at=now() - timedelta(days=12))
+        for i, machine in enumerate(machines):
+            for n in range(i % 3, 40, 3):
+                InspectionReport.objects.create(machine=machine, worker=engineer, due_date=today - timedelta(days=n))
+            for n in range(i % 4, 40, 5):
+                PendingInspection.objects.create(machine=machine, date_due=today - timedelta(days=n))  # today too
+
+        start, end = today - timedelta(days=29), today + timedelta(days=5)
+        client = APIClient()
+        client.force_authenticate(engineer)
+        data = client.get(f"/api/dashboard/engineer/heatmap/?start={start}&end={end}").data
+        rows, days = len(data["machine_ids"]), data["days"]
+        bits = {
+            name: np.unpackbits(np.frombuffer(base64.b64decode(value), dtype=np.uint8))[:rows * days].reshape(rows, days)
+            for name, value in data["statuses"].items()
+        }
+        self.assertTrue(all(cells.any() for cells in bits.values()))
+
+        for row, machine in enumerate(Machine.objects.filter(id__in=data["machine_ids"]).order_by("id")):
+            reported = set(InspectionReport.objects.filter(machine=machine).values_list("due_date", flat=True))
+            pending = set(PendingInspection.objects.filter(machine=machine, resolved=False).values_list("date_due", flat=True))
+            due = set(as_dates(occurrences(machine_rule(machine), start, end, machine_anchor(machine))))
+            for col in range(days):
+                day = start + timedelta(days=col)
+                cell = {name for name in bits if bits[name][row, col]}
+                expected = {MachineScheduleView.get_status(today, day, [day], reported, pending)} if day in due else set()
+                self.assertEqual(cell, expected, (machine.name, day))
+
+
+class MachineDueTests(TestCase):
+    """due() / summary() with custom rules, before any DueOccurrence row exists."""
+
+    def setUp(self):
+        self.today = localdate()
+        self.engineer = CustomUser.objects.create_user(email="eng@example.com", username="eng", password="x", user_type="engineer")
+        self.worker = CustomUser.objects.create_user(worker_id="w1", username="w1", password="x", user_type="worker", created_by=self.engineer)
+        today_name = WEEKDAYS[self.today.weekday()]
+        other_name = WEEKDAYS[(self.today.weekday() + 1) % 7]
+        rules = {
+            "every_other_day": "FREQ=DAILY;INTERVAL=2",  # created 4 days ago: due today
+            "every_third_day": "FREQ=DAILY;INTERVAL=3",  # ...not today
+            "today_weekly": f"FREQ=WEEKLY;BYDAY={today_name}",
+            "other_weekly": f"FREQ=WEEKLY;BYDAY={other_name}",
+            "inspected": "FREQ=DAILY",
+        }
+        self.machines = {
+            name: Machine.objects.create(
+                name=name, engineer=self.engineer, worker=self.worker, recurrence_rule=rule, location="Floor 1",
+            )
+            for name, rule in rules.items()
+        }
+        Machine.objects.update(created_at=now() - timedelta(days=4))
+        InspectionReport.objects.create(machine=self.machines["inspected"], worker=self.worker, due_date=self.today)
+
+    def test_custom_rules_are_due_without_occurrences(self):
+        self.assertFalse(DueOccurrence.objects.exists())
+        due = set(Machine.objects.due(self.today).values_list("name", flat=True))
+        self.assertEqual(due, {"every_other_day", "today_weekly"})
+        self.assertEqual(Machine.objects.filter(worker=self.worker).summary(self.today)["due"], 2)
+
+    def test_inspection_in_the_period_covers_the_due_date(self):
+        machine = self.machines["every_other_day"]
+        InspectionReport.objects.create(machine=machine, worker=self.worker, due_date=self.today - timedelta(days=1))
+        InspectionReport.objects.filter(machine=machine).update(timestamp=now() - timedelta(days=1))
+        self.assertNotIn(machine, Machine.objects.due(self.today))
+        self.assertIn(machine, Machine.objects.due(self.today + timedelta(days=2)))
+
+
+class CheckPendingFixture:
+    def setUp(self):
+        self.today = localdate()
+        self.start = self.today - timedelta(days=40)
+        self.end = self.today - timedelta(days=1)
+        self.engineer = CustomUser.objects.create_user(email="eng@example.com", username="eng", password="x", user_type="engineer")
+        self.worker = CustomUser.objects.create_user(worker_id="w1", username="w1", password="x", user_type="worker", created_by=self.engineer)
+        machines = [
+            Machine.objects.create(
+                name=f"m{i}", engineer=self.engineer, worker=self.worker, inspection_frequency=FREQUENCIES[i % 3], location="Floor 1",
+            )
+            for i in range(12)
+        ]
+        Machine.objects.update(created_at=now() - timedelta(days=60))
+        InspectionReport.objects.bulk_create([
+            InspectionReport(machine=machines[i % 12], worker=self.worker, due_date=self.start + timedelta(days=i % 40))
+            for i in range(0, 200, 7)
+        ])
+        PendingInspection.objects.bulk_create([
+            PendingInspection(machine=machines[i % 12], date_due=self.start + timedelta(days=i % 40), resolved=i % 2 == 0)
+            for i in range(0, 120, 11)
+        ])
+
+    def run_command(self, **options):
+        counts = {}
+        call_command(
+            "check_pending", start=str(self.start), end=str(self.end), stdout=StringIO(),
+            progress=lambda event: counts.__setitem__(date.fromisoformat(event["date"]), event["new_pendings"]),
+            **options,
+        )
+        return counts
+
+    def open_pendings(self):
+        return set(PendingInspection.objects.filter(resolved=False).values_list("machine_id", "date_due"))
+
+
+class CheckPendingTests(CheckPendingFixture, TestCase):
+    """The set-based engine against the per-machine loop it replaced."""
+
+    @staticmethod
+    def legacy_was_due_on(machine, day):
+        if machine.inspection_frequency == "daily":
+            return True
+        if machine.inspection_frequency == "weekly":
+            return day.weekday() == 5
+        return (day + timedelta(days=1)).day == 1
+
+    def run_legacy(self):
+        """The original check_pending loop: three queries per machine and day."""
+        created = {}
+        for delta in range((self.end - self.start).days + 1):
+            day = self.start + timedelta(days=delta)
+            created[day] = 0
+            for machine in Machine.objects.all():
+                if not self.legacy_was_due_on(machine, day):
+                    continue
+                if InspectionReport.objects.filter(machine=machine, due_date=day).exists():
+                    continue
+                if PendingInspection.objects.filter(machine=machine, date_due=day, resolved=False).exists():
+                    continue
+                PendingInspection.objects.create(machine=machine, date_due=day)
+                created[day] += 1
+        return created
+
+    def test_matches_the_per_machine_loop(self):
+        before = set(PendingInspection.objects.values_list("id", flat=True))
+        expected_counts = self.run_legacy()
+        expected = self.open_pendings()
+        PendingInspection.objects.exclude(id__in=before).delete()
+
+        for batch_size in (5000, 7):  # one window, then many windows and machine chunks
+            with self.subTest(batch_size=batch_size):
+                self.assertEqual(self.run_command(batch_size=batch_size), expected_counts)
+                self.assertEqual(self.open_pendings(), expected)
+                PendingInspection.objects.exclude(id__in=before).delete()
+
+    def test_second_run_adds_nothing(self):
+        first = self.run_command()
+        self.assertGreater(sum(first.values()), 0)
+        self.assertEqual(sum(self.run_command().values()), 0)
+
+    def test_counts_skip_rows_inserted_by_a_concurrent_run(self):
+        insert = pending._insert_pendings
+        raced = []
+
+        def racing(pairs, batch_size):
+            # Another run commits some of these between our reads and our insert
+            for machine_id, day in pairs[:3]:
+                raced.append(PendingInspection.objects.create(machine_id=machine_id, date_due=day))
+            return insert(pairs, batch_size)
+
+        before = PendingInspection.objects.count()
+        with mock.patch.object(pending, "_insert_pendings", racing):
+            counts = self.run_command(batch_size=7)
+        self.assertTrue(raced)
+        self.assertEqual(sum(counts.values()), PendingInspection.objects.count() - before - len(raced))
+
+
+class IncrementalCheckPendingTests(CheckPendingFixture, TestCase):
+    def incremental(self, **options):
+        counts, out, err = {}, StringIO(), StringIO()
+        call_command(
+            "check_pending", incremental=True, stdout=out, stderr=err,
+            progress=lambda event: counts.__setitem__(date.fromisoformat(event["date"]), event["new_pendings"]),
+            **options,
+        )
+        return counts, out.getvalue(), err.getvalue()
+
+    def test_first_run_needs_days(self):
+        _, _, err = self.incremental()
+        self.assertIn("No checkpoint yet", err)
+        self.assertFalse(CommandCheckpoint.objects.exists())
+
+    def test_resumes_after_the_checkpoint(self):
+        yesterday = now().date() - timedelta(days=1)  # the command works in UTC dates
+        counts, _, _ = self.incremental(days=10)
+        self.assertEqual(sorted(counts), [yesterday - timedelta(days=i) for i in range(9, -1, -1)])
+        self.assertEqual(CommandCheckpoint.objects.get(name="check_pending").last_date, yesterday)
+
+        counts, out, _ = self.incremental(days=10)
+        self.assertEqual(counts, {})
+        self.assertIn("Already up to date", out)
+
+        CommandCheckpoint.objects.filter(name="check_pending").update(last_date=yesterday - timedelta(days=3))
+        counts, _, _ = self.incremental(days=10)
+        self.assertEqual(sorted(counts), [yesterday - timedelta(days=i) for i in range(2, -1, -1)])
+        self.assertEqual(sum(counts.values()), 0)  # those days were already checked
+
+    def test_rechecks_machines_whose_schedule_changed(self):
+        yesterday = now().date() - timedelta(days=1)
+        self.incremental(days=10)
+        machine = Machine.objects.filter(inspection_frequency="monthly").first()
+        machine.inspection_frequency = "daily"
+        machine.save()
+
+        self.incremental(days=10)
+        missed = set(PendingInspection.objects.filter(machine=machine, resolved=False).values_list("date_due", flat=True))
+        reported = set(InspectionReport.objects.filter(machine=machine).values_list("due_date", flat=True))
+        window = {yesterday - timedelta(days=i) for i in range(10)}
+        self.assertTrue(window - reported)
+        self.assertEqual(window - reported, window & missed)
+
+
+@mock.patch("builtins.print")  # check_pending --simple prints each day
+@mock.patch.object(jobs, "connection")  # the runner closes its thread's connection
+@mock.patch.object(jobs, "close_old_connections")
+class CheckPendingJobTests(CheckPendingFixture, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = CustomUser.objects.create_user(email="admin@example.com", username="admin", password="x", user_type="admin")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_job_records_progress_and_output(self, *mocks):
+        job = CheckPendingJob.objects.create(options={"start": str(self.start), "end": str(self.end)})
+        jobs.run_check_pending_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CheckPendingJob.Status.SUCCEEDED)
+        self.assertEqual((job.days_done, job.days_total), (40, 40))
+        self.assertEqual(job.pendings_created, PendingInspection.objects.filter(created_at__gte=job.started_at).count())
+        self.assertEqual(job.output.count("new pending inspections recorded for"), 40)
+        self.assertIn("Total new pending inspections", job.output)
+
+    def test_bad_options_fail_the_job(self, *mocks):
+        job = CheckPendingJob.objects.create(options={"start": str(self.end), "end": str(self.start)})
+        jobs.run_check_pending_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, CheckPendingJob.Status.FAILED)
+        self.assertIn("Start date must be before", job.error)
+
+    def test_stale_jobs_are_failed_when_read(self, *mocks):
+        stale = CheckPendingJob.objects.create(status=CheckPendingJob.Status.RUNNING)
+        fresh = CheckPendingJob.objects.create(status=CheckPendingJob.Status.RUNNING)
+        CheckPendingJob.objects.filter(id=stale.id).update(updated_at=now() - timedelta(hours=1))
+
+        response = self.client.get(f"/api/dashboard/check-pending/{stale.id}/")
+        self.assertEqual(response.data["status"], CheckPendingJob.Status.FAILED)
+        self.assertEqual(self.client.get(f"/api/dashboard/check-pending/{fresh.id}/").data["status"], CheckPendingJob.Status.RUNNING)
+
+    def test_a_job_failed_as_stale_stays_failed(self, *mocks):
+        job = CheckPendingJob.objects.create(options={"days": 2})
+
+        def fail_midway(*args, progress, **options):
+            progress({"days_done": 1, "days_total": 2, "new_pendings": 0, "message": "day 1"})
+            CheckPendingJob.objects.filter(id=job.id).update(updated_at=now() - timedelta(hours=1))
+            jobs.fail_stale_jobs()
+
+        with mock.patch.object(jobs, "call_command", fail_midway):
+            jobs.run_check_pending_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, CheckPendingJob.Status.FAILED)
+        self.assertEqual(job.days_done, 1)
+
+
+@mock.patch("builtins.print")
+class StreamedCheckPendingTests(CheckPendingFixture, TransactionTestCase):
+    """?stream=1 runs the command on a helper thread with its own connection."""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = CustomUser.objects.create_user(email="admin@example.com", username="admin", password="x", user_type="admin")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def stream(self, data):
+        response = self.client.post("/api/dashboard/check-pending/?stream=1", data, format="json")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        return [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+    def test_one_line_per_day_then_done(self, _):
+        before = PendingInspection.objects.count()
+        events = self.stream({"start": str(self.start), "end": str(self.end)})
+        days, done = events[:-1], events[-1]
+        self.assertEqual([event["date"] for event in days], [str(self.start + timedelta(days=i)) for i in range(40)])
+        self.assertEqual([event["days_done"] for event in days], list(range(1, 41)))
+        self.assertEqual(sum(event["new_pendings"] for event in days), PendingInspection.objects.count() - before)
+        self.assertEqual(done["done"], True)
+        self.assertEqual(done["success"], True)
+
+    def test_command_errors_end_the_stream(self, _):
+        events = self.stream({"start": str(self.end), "end": str(self.start)})
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["success"], False)
+        self.assertIn("Start date must be before", events[0]["error"])
+
+
+class ShardedCheckPendingTests(CheckPendingFixture, TransactionTestCase):
+    """--workers: shards run on separate connections, so the rows must be committed."""
+
+    def test_shards_cover_the_table(self):
+        ids = list(Machine.objects.order_by("id").values_list("id", flat=True))
+        shards = pending.machine_shards(5)
+        self.assertEqual(len(shards), 4)  # 12 machines in shards of ceil(12 / 5)
+        covered = [machine_id for first, last in shards for machine_id in ids if first <= machine_id <= last]
+        self.assertEqual(covered, ids)
+        self.assertEqual(len(pending.machine_shards(50)), len(ids))
+
+    def test_parallel_matches_serial(self):
+        before = set(PendingInspection.objects.values_list("id", flat=True))
+        serial = self.run_command()
+        expected = self.open_pendings()
+        PendingInspection.objects.exclude(id__in=before).delete()
+
+        # A worker thread instead of processes: same sharding and merging, on
+        # its own connection, and it can reach an in-memory SQLite test database
+        def executor(max_workers, initializer):
+            return ThreadPoolExecutor(max_workers=1, initializer=initializer)
+
+        with mock.patch.object(pending, "ProcessPoolExecutor", executor):
+            self.assertEqual(self.run_command(workers=3, batch_size=7), serial)
+        self.assertEqual(self.open_pendings(), expected)
+
+
+class SchedulerLeaseTests(TestCase):
+    def test_one_owner_at_a_time(self):
+        self.assertTrue(scheduler.try_acquire("task", 60))
+        with mock.patch.object(scheduler, "OWNER", "other-host:1"):
+            self.assertFalse(scheduler.try_acquire("task", 60))
+            self.assertFalse(scheduler.renew("task", 60))
+        self.assertTrue(scheduler.renew("task", 60))
+
+        SchedulerLock.objects.filter(name="task").update(locked_until=now() - timedelta(seconds=1))
+        with mock.patch.object(scheduler, "OWNER", "other-host:1"):
+            self.assertTrue(scheduler.try_acquire("task", 60))
+        self.assertEqual(SchedulerLock.objects.get(name="task").owner, "other-host:1")
+
+    def test_creation_race_loses_the_round(self):
+        with mock.patch.object(SchedulerLock.objects, "get_or_create", side_effect=IntegrityError):
+            self.assertFalse(scheduler.try_acquire("task", 60))
+
+    @mock.patch.object(scheduler, "call_command")
+    def test_finished_run_waits_for_its_interval(self, call_command):
+        started = now()
+        self.assertTrue(scheduler.try_acquire("task", 60))
+        scheduler.run_task("task", {"interval": 3600}, 60)
+        lock = SchedulerLock.objects.get(name="task")
+        self.assertGreaterEqual(lock.locked_until, started + timedelta(seconds=3600))
+        self.assertEqual(lock.last_error, "")
+        self.assertFalse(scheduler.try_acquire("task", 60))
+
+
+class SchedulerRenewalTests(TransactionTestCase):
+    """The lease is renewed on a helper thread with its own connection."""
+
+    def test_long_run_keeps_the_lease(self):
+        samples = []
+        renew = scheduler.renew
+
+        def sampled(name, lease):
+            renewed = renew(name, lease)
+            samples.append((now(), SchedulerLock.objects.get(name=name).locked_until))
+            return renewed
+
+        # Runs for five times its interval and lease; only the main thread sleeps meanwhile
+        task = {"interval": 0.1}
+        self.assertTrue(scheduler.try_acquire("task", 0.1))
+        with mock.patch.object(scheduler, "renew", sampled), \
+                mock.patch.object(scheduler, "call_command", lambda *args, **kwargs: time.sleep(0.5)):
+            scheduler.run_task("task", task, 0.1)
+
+        self.assertGreater(len(samples), 3)
+        for sampled_at, locked_until in samples:
+            self.assertGreater(locked_until, sampled_at)
+
+
+@mock.patch("builtins.print")  # EngineerCreatedMachinesView logs each request
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.engineer = CustomUser.objects.create_user(email="eng@example.com", username="eng", password="x", user_type="engineer")
+        Machine.objects.bulk_create([
+            Machine(name=f"m{i}", engineer=self.engineer, location="Floor 1") for i in range(23)
+        ])
+        # Three distinct created_at values, so most page boundaries fall inside a tie
+        base = now() - timedelta(days=1)
+        for i, machine_id in enumerate(Machine.objects.order_by("id").values_list("id", flat=True)):
+            Machine.objects.filter(id=machine_id).update(created_at=base + timedelta(seconds=(i * 7) % 3))
+        self.expected = list(Machine.objects.order_by("created_at", "id").values_list("id", flat=True))
+        self.client = APIClient()
+        self.client.force_authenticate(self.engineer)
+
+    def follow(self, url, key):
+        ids, pages = [], 0
+        while url and pages < 10:  # a cursor that doesn't advance would loop forever
+            data = self.client.get(url).data
+            ids += [row["id"] for row in data[key]]
+            url, pages = data["next"], pages + 1
+        return ids, pages
+
+    def test_cursors_visit_each_row_once_in_order(self, _):
+        for fast in (False, True):
+            with self.subTest(fast=fast), override_settings(FAST_READ_PATH=fast):
+                for path, key in (("/api/dashboard/machines/", "results"), ("/api/dashboard/machines/engineer/", "machines")):
+                    ids, pages = self.follow(f"{path}?page_size=4", key)
+                    self.assertEqual(ids, self.expected, path)
+                    self.assertEqual(pages, 6)
+
+
+@mock.patch("builtins.print")  # the summary view logs each request
+class SummaryCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.engineer = CustomUser.objects.create_user(email="eng@example.com", username="eng", password="x", user_type="engineer")
+        self.worker = CustomUser.objects.create_user(worker_id="w1", username="w1", password="x", user_type="worker", created_by=self.engineer)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.machine = Machine.objects.create(name="press", engineer=self.engineer, worker=self.worker, inspection_frequency="daily", location="Floor 1")
+        self.client = APIClient()
+        self.client.force_authenticate(self.worker)
+
+    def summary(self):
+        return self.client.get("/api/dashboard/dashboard-summary/").data
+
+    def test_writes_invalidate_the_cached_summary(self, _):
+        self.assertEqual(self.summary(), {"due": 1, "pending": 0, "escalated": 0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pending = PendingInspection.objects.create(machine=self.machine, date_due=localdate() - timedelta(days=1))
+        self.assertEqual(self.summary()["pending"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report = InspectionReport.objects.create(machine=self.machine, worker=self.worker, due_date=localdate(), look=False, is_escalated=True)
+        self.assertEqual(self.summary(), {"due": 0, "pending": 0, "escalated": 1})  # escalated machines' pendings aren't counted
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report.delete()
+        self.assertEqual(self.summary(), {"due": 1, "pending": 1, "escalated": 0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pending.delete()
+        self.assertEqual(self.summary()["pending"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.machine.delete()
+        self.assertEqual(self.summary(), {"due": 0, "pending": 0, "escalated": 0})
+
+    def test_saving_a_machine_bumps_its_users_versions(self, _):
+        keys = summary_cache.summary_key(self.engineer.id), summary_cache.summary_key(self.worker.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.machine.location = "Floor 2"
+            self.machine.save()
+        self.assertNotEqual(keys[0], summary_cache.summary_key(self.engineer.id))
+        self.assertNotEqual(keys[1], summary_cache.summary_key(self.worker.id))
+
+
+class SummaryStampedeTests(SimpleTestCase):
+    user = mock.Mock(id=42)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_build_once(self):
+        calls = []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.3)
+            return {"due": len(calls)}
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: summary_cache.get_summary(self.user, build), range(8)))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"due": 1}] * 8)
+
+    def test_expired_entry_is_served_while_another_request_rebuilds(self):
+        summary_cache.get_summary(self.user, lambda: {"due": 1})
+        key = summary_cache.summary_key(self.user.id)
+        cache.set(key, {"data": {"due": 1}, "fresh_until": time.time() - 1})
+        cache.add(f"{key}:lock", True)
+
+        build = mock.Mock(return_value={"due": 2})
+        self.assertEqual(summary_cache.get_summary(self.user, build), {"due": 1})
+        build.assert_not_called()
+
+        cache.delete(f"{key}:lock")
+        self.assertEqual(summary_cache.get_summary(self.user, build), {"due": 2})
+
+
+class SyncTests(TestCase):
+    def setUp(self):
+        self.engineer = CustomUser.objects.create_user(email="eng@example.com", username="eng", password="x", user_type="engineer")
+        self.worker = CustomUser.objects.create_user(worker_id="w1", username="w1", password="x", user_type="worker", created_by=self.engineer)
+        self.other = CustomUser.objects.create_user(worker_id="w2", username="w2", password="x", user_type="worker", created_by=self.engineer)
+        self.machine = Machine.objects.create(name="press", engineer=self.engineer, worker=self.worker, location="Floor 1")
+        self.spare = Machine.objects.create(name="lathe", engineer=self.engineer, worker=self.worker, location="Floor 2")
+        PendingInspection.objects.create(machine=self.machine, date_due=localdate() - timedelta(days=2))
+        self.client = APIClient()
+
+    def sync(self, user, token=None):
+        self.client.force_authenticate(user)
+        response = self.client.get("/api/dashboard/sync/", {"token": token} if token else {})
+        self.assertEqual(response.status_code, 200, response.content[:200])
+        return response.data
+
+    def backdate(self, data):
+        # The token re-reads OVERLAP seconds back; move the snapshot out of that window
+        Machine.objects.update(updated_at=now() - timedelta(minutes=5))
+        PendingInspection.objects.update(updated_at=now() - timedelta(minutes=5))
+        return data["token"]
+
+    def test_full_then_empty_delta(self):
+        data = self.sync(self.worker)
+        self.assertTrue(data["full"])
+        self.assertEqual({m["id"] for m in data["machines"]}, {self.machine.id, self.spare.id})
+        self.assertEqual(len(data["pending_inspections"]), 1)
+
+        data = self.sync(self.worker, self.backdate(data))
+        self.assertFalse(data["full"])
+        self.assertEqual((data["machines"], data["pending_inspections"], data["deleted"]["machines"]), ([], [], []))
+
+    def test_reassignment_and_delete(self):
+        token = self.backdate(self.sync(self.worker))
+        other_token = self.backdate(self.sync(self.other))
+        engineer_token = self.backdate(self.sync(self.engineer))
+
+        self.machine.worker = self.other
+        self.machine.save()
+        spare_id = self.spare.id
+        self.spare.delete()
+
+        data = self.sync(self.worker, token)
+        self.assertEqual(data["machines"], [])
+        self.assertEqual(data["deleted"]["machines"], sorted([self.machine.id, spare_id]))
+
+        data = self.sync(self.other, other_token)
+        self.assertEqual([m["id"] for m in data["machines"]], [self.machine.id])
+        self.assertEqual(len(data["pending_inspections"]), 1)  # comes with the machine
+
+        data = self.sync(self.engineer, engineer_token)
+        self.assertEqual([m["id"] for m in data["machines"]], [self.machine.id])
+        self.assertEqual(data["deleted"]["machines"], [spare_id])
+
+    def test_deleted_worker(self):
+        token = self.backdate(self.sync(self.engineer))
+        self.client.force_authenticate(self.engineer)
+        self.assertEqual(self.client.delete(f"/api/users/{self.worker.id}/delete/").status_code, 200)
+
+        data = self.sync(self.engineer, token)
+        self.assertEqual(data["deleted"]["users"], [self.worker.id])
+        self.assertEqual({m["id"] for m in data["machines"]}, {self.machine.id, self.spare.id})
+        self.assertTrue(all(m["worker"] is None for m in data["machines"]))
+
+    def test_bad_token(self):
+        self.client.force_authenticate(self.worker)
+        self.assertEqual(self.client.get("/api/dashboard/sync/", {"token": "nope"}).status_code, 400)
+        # Someone else's token falls back to a full sync
+        self.assertTrue(self.sync(self.worker, self.sync(self.other)["token"])["full"])
+
+
+class InspectionBatchTests(TestCase):
+    def setUp(self):
+        self.engineer = CustomUser.objects.create_user(email="eng@example.com", username="eng", password="x", user_type="engineer")
+        self.worker = CustomUser.objects.create_user(worker_id="w1", username="w1", password="x", user_type="worker", created_by=self.engineer)
+        other = CustomUser.objects.create_user(worker_id="w2", username="w2", password="x", user_type="worker", created_by=self.engineer)
+        self.machines = [
+            Machine.objects.create(name=f"m{i}", engineer=self.engineer, worker=self.worker, inspection_frequency="daily", location="Floor 1")
+            for i in range(10)
+        ]
+        self.foreign = Machine.objects.create(name="other", engineer=self.engineer, worker=other, location="Floor 2")
+        self.today = localdate()
+        PendingInspection.objects.bulk_create([
+            PendingInspection(machine=machine, date_due=self.today - timedelta(days=1)) for machine in self.machines
+        ])
+        InspectionReport.objects.create(machine=self.machines[0], worker=self.worker, due_date=self.today - timedelta(days=2))
+        self.client = APIClient()
+        self.client.force_authenticate(self.worker)
+
+    def post(self, items):
+        response = self.client.post("/api/dashboard/inspection-reports/batch/", items, format="json")
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        return response.data
+
+    def test_results_per_item(self):
+        day = lambda n: str(self.today - timedelta(days=n))
+        data = self.post([
+            {"machine": self.machines[1].id, "due_date": day(1), "look": False},
+            {"machine": self.machines[0].id, "due_date": day(2)},  # already reported
+            {"machine": self.foreign.id, "due_date": day(1)},
+            {"machine": 999999, "due_date": day(1)},
+            {"machine": self.machines[1].id, "due_date": day(1)},  # repeated in the batch
+            {"machine": self.machines[2].id, "due_date": str(self.today + timedelta(days=1))},
+            {"machine": self.machines[2].id, "due_date": day(1)},
+        ])
+        self.assertEqual(
+            [result["status"] for result in data["results"]],
+            ["created", "failed", "failed", "failed", "failed", "failed", "created"],
+        )
+        self.assertEqual(data["results"][1]["error"], "Inspection already done.")
+        self.assertEqual(data["results"][2]["error"], "You are not assigned to this machine.")
+        self.assertEqual(data["results"][3]["error"], "Machine not found.")
+        self.assertIn("due_date", data["results"][5]["error"])
+        self.assertTrue(data["results"][0]["report"]["is_escalated"])
+
+        resolved = PendingInspection.objects.filter(resolved=True).values_list("machine_id", flat=True)
+        self.assertEqual(set(resolved), {self.machines[1].id, self.machines[2].id})
+        machine = Machine.objects.get(id=self.machines[1].id)
+        self.assertIsNotNone(machine.last_inspected_at)
+        self.assertGreater(machine.next_due_date, self.today - timedelta(days=1))
+
+    def test_query_count_is_flat(self):
+        items = [
+            {"machine": machine.id, "due_date": str(self.today - timedelta(days=n))}
+            for machine in self.machines for n in (1, 3, 4)
+        ]
+        # 2 checks, savepoint, insert, pendings, lock + update machines, 3 dates, release
+        with self.assertNumQueries(11):
+            data = self.post(items)
+        self.assertEqual(data["created"], 30)
+
+
+class IdempotentSubmissionTests(TestCase):
+    def setUp(self):
+        engineer = CustomUser.objects.create_user(email="eng@example.com", username="eng", password="x", user_type="engineer")
+        self.worker = CustomUser.objects.create_user(worker_id="w1", username="w1", password="x", user_type="worker", created_by=engineer)
+        self.machine = Machine.objects.create(name="press", engineer=engineer, worker=self.worker, location="Floor 1")
+        self.body = {"machine": self.machine.id, "due_date": str(localdate() - timedelta(days=1)), "look": True}
+        self.client = APIClient()
+        self.client.force_authenticate(self.worker)
+
+    def submit(self, body, key=None):
+        headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+        return self.client.post("/api/dashboard/inspection-reports/", body, format="json", **headers)
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.submit(self.body, key="abc")
+        self.assertEqual(first.status_code, 201)
+        retry = self.submit(self.body, key="abc")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.data["id"], first.data["id"])
+        self.assertEqual(InspectionReport.objects.count(), 1)
+
+        self.assertEqual(self.submit({**self.body, "look": False}, key="abc").status_code, 422)
+
+    def test_key_of_a_dead_request_is_taken_over(self):
+        request = mock.Mock(method="POST", path="/api/dashboard/inspection-reports/", data=self.body)
+        stuck = IdempotencyKey.objects.create(user=self.worker, key="abc", fingerprint=idempotency.fingerprint(request))  # never answered
+        self.assertEqual(self.submit(self.body, key="abc").status_code, 409)
+
+        IdempotencyKey.objects.filter(pk=stuck.pk).update(created_at=now() - timedelta(minutes=10))
+        first = self.submit(self.body, key="abc")
+        self.assertEqual(first.status_code, 201)
+        retry = self.submit(self.body, key="abc")
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.data["id"], first.data["id"])
+
+    def test_duplicate_without_key_hits_the_constraint(self):
+        self.assertEqual(self.submit(self.body).status_code, 201)
+        second = self.submit(self.body)
+        self.assertEqual(second.status_code, 400)
+        self.assertEqual(second.data["message"], "Inspection already done.")
+        self.assertEqual(InspectionReport.objects.count(), 1)
+
+    def test_batch_retry(self):
+        url = "/api/dashboard/inspection-reports/batch/"
+        first = self.client.post(url, [self.body], format="json", HTTP_IDEMPOTENCY_KEY="batch-1")
+        retry = self.client.post(url, [self.body], format="json", HTTP_IDEMPOTENCY_KEY="batch-1")
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(first.data["created"], 1)
+        self.assertEqual(InspectionReport.objects.count(), 1)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_same_bytes_as_json_renderer(self):
+        payloads = [
+            {"id": 1, "name": "Presse \u2028 1", "tags": ["a", None, True], "nested": {"due_date": "2025-01-01"}},
+            {"count": 10 ** 20},
+            {"ratio": 1e16},
+            [0.00001, 1.5e-7, 0.1, 2.0, -3.25],
+            {"rows": [{"score": 1e-05}]},
+        ]
+        for payload in payloads:
+            with self.subTest(payload=payload):
+                self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+
+    def test_floats_and_nan_go_through_the_stock_renderer(self):
+        # DRF's encoder turns a bare Decimal into a float
+        self.assertEqual(FastJSONRenderer().render({"amount": Decimal("1E-7")}), b'{"amount":1e-07}')
+        with self.assertRaises(ValueError):
+            FastJSONRenderer().render({"ratio": float("nan")})
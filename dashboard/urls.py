@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import MachineCreateView, EngineerCreatedMachinesView, MachineByUser,MachineDeleteView, MachineDetailView, AssignWorkerToMachineView, DashboardSummaryViewSet, DueMachinesView, MachineScheduleView, EngineerMachineAnalyticsView, InspectionReportView, CheckPendingAPIView
+from .views import MachineCreateView, EngineerCreatedMachinesView, MachineByUser,MachineDeleteView, MachineDetailView, AssignWorkerToMachineView, DashboardSummaryViewSet, DueMachinesView, MachineScheduleView, EngineerMachineAnalyticsView, EngineerHeatmapView, EngineerComplianceView, EngineerLatencyView, InspectionReportView, CheckPendingAPIView, CheckPendingJobStatusView, SyncView, InspectionBatchView
 
 urlpatterns = [
     # path('machines/', MachineListView.as_view(), name='machine-list'),  # Engineers & Admins can view all machines
@@ -15,12 +15,18 @@ urlpatterns = [
     # inspectio
     path('dashboard-summary/', DashboardSummaryViewSet.as_view(), name='worker-dashboard-summary'), # get machine by engineer
     path('engineer/machine-analytics/', EngineerMachineAnalyticsView.as_view(), name='engineer-machine-analytics'),
+    path('engineer/heatmap/', EngineerHeatmapView.as_view(), name='engineer-heatmap'),
+    path('engineer/compliance/', EngineerComplianceView.as_view(), name='engineer-compliance'),
+    path('engineer/latency/', EngineerLatencyView.as_view(), name='engineer-latency'),
     path('worker/due-machine-list/', DueMachinesView.as_view(), name='engineer-dashboard-summary'), # get machine by engineer
     # path('worker/add-inspection/', AddInspectionReportView.as_view(), name='add-inspection'), # get machine by engineer
 
     path('inspection-reports/', InspectionReportView.as_view(), name='inspection-report-submit'),
+    path('inspection-reports/batch/', InspectionBatchView.as_view(), name='inspection-report-batch'),
 
     path('check-pending/', CheckPendingAPIView.as_view(), name='check-pending-api'),
+    path('check-pending/<int:job_id>/', CheckPendingJobStatusView.as_view(), name='check-pending-job-status'),
+    path('sync/', SyncView.as_view(), name='sync'),  # delta sync for offline devices
 
 
 ]
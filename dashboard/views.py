@@ -3,23 +3,42 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .permissions import IsAdmin, IsEngineer, IsWorker
 from .models import Machine
-from .serializers import MachineSerializer,   MachineWithDueDateSerializer, InspectionReportSerializer
+from .serializers import MachineSerializer,   MachineWithDueDateSerializer, InspectionReportSerializer, CheckPendingJobSerializer
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework import status, permissions
 from rest_framework.views import APIView
-from .models import InspectionReport, Escalation, PendingInspection
-from django.utils.timezone import now
+from .models import InspectionReport, Escalation, PendingInspection, CheckPendingJob, DueOccurrence
+from .jobs import fail_stale_jobs, submit_check_pending, stream_check_pending
+from .compliance import compliance_series
+from .heatmap import encode_bitsets, status_matrix
+from .idempotency import idempotent
+from .inspections import MAX_BATCH, submit_batch
+from .latency import latency_report
+from .summary_cache import get_summary
+from .sync import changes
+from .recurrence import DAILY, WEEKLY, MONTHLY, as_dates, machine_anchor, machine_rule, month_bounds, occurrences
+from django.conf import settings
+from llf_backend.conditional import Validators, scope_state
+from llf_backend.fastpath import FastRendererMixin, ValuesRows, fast_read_path_enabled, serialize_list
+from llf_backend.fieldsets import only_selected
+from llf_backend.pagination import KeysetPagination
+from django.core.cache import cache
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.http import StreamingHttpResponse
+from django.utils.timezone import now, localdate
 from datetime import datetime, timedelta, date
-from calendar import monthrange
 from django.shortcuts import get_object_or_404
-import calendar
 from authentication.models import CustomUser  # for fetching worker by ID
-from django.db import DatabaseError
+from django.db import DatabaseError, IntegrityError, transaction
 from rest_framework.exceptions import NotFound, ValidationError
-from io import StringIO
-from django.core.management import call_command
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
+# engineer_name / worker_name are in machine payloads, so renames must change their ETags
+MACHINE_USER_STAMPS = ("engineer__updated_at", "worker__updated_at")
+
 # #########################   machine ##############################
 class MachineListView(APIView):
     """Only Engineers & Admins can view the list of machines."""
@@ -81,64 +100,84 @@ class MachineDeleteView(APIView):
         except Machine.DoesNotExist:
             return Response({"error": "Machine not found."}, status=status.HTTP_404_NOT_FOUND)
 
-class MachineByUser(ListAPIView):
+class MachineByUser(FastRendererMixin, ListAPIView):
     serializer_class = MachineSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination  # opt-in with ?page_size= / ?cursor=
 
     def get_queryset(self):
         user = self.request.user
 
+        # engineer_name / worker_name are read for every row; ?fields= trims both
+        machines = only_selected(Machine.objects.select_related("engineer", "worker"), self.serializer_class, self.request)
+
         if user.user_type == "worker":
-            return Machine.objects.filter(worker__worker_id=user.worker_id)
+            return machines.filter(worker__worker_id=user.worker_id)
 
         elif user.user_type == "engineer":
-            return Machine.objects.filter(engineer=user)
+            return machines.filter(engineer=user)
 
         elif user.user_type == "admin":
-            return Machine.objects.all()
+            return machines.all()
 
         return Machine.objects.none()
 
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
 
-        if queryset.exists():
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data
-            , status=status.HTTP_200_OK)
+        latest, count, *users = scope_state(queryset, related=MACHINE_USER_STAMPS)
+        validators = Validators(request, latest, count, *users)
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        if self.paginator.is_requested(request) or count:
+            data, paginated = serialize_list(request, queryset, self.serializer_class, self.paginator)
+            if paginated:
+                return validators.apply(self.get_paginated_response(data))
+            return validators.apply(Response(data
+            , status=status.HTTP_200_OK))
         else:
             return Response({
                 "success": False,
                 "message": "No machines found for the current user."
             }, status=status.HTTP_404_NOT_FOUND)
 
-class EngineerCreatedMachinesView(ListAPIView):
+class EngineerCreatedMachinesView(FastRendererMixin, ListAPIView):
 
     serializer_class = MachineSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination  # opt-in with ?page_size= / ?cursor=
 
     def get_queryset(self):
         user = self.request.user
         print('## = user', user)
         print('## = user', user, user.user_type)
 
+        machines = only_selected(Machine.objects.select_related("engineer", "worker"), self.serializer_class, self.request)
+
         # Ensure the logged-in user is an engineer or admin
         if user.user_type == "engineer":
-            return Machine.objects.filter(engineer=user)
+            return machines.filter(engineer=user)
         elif user.user_type == "admin":
-            return Machine.objects.all()  # Admin can see all machines
+            return machines.all()  # Admin can see all machines
 
         # If the user is neither an engineer nor an admin, deny access
         return Machine.objects.none()  # Return empty queryset to avoid permission errors
     
     def list(self, request, *args, **kwargs):  
         queryset = self.get_queryset()  
-        serialized_machines = self.get_serializer(queryset, many=True).data  
+        latest, total, *users = scope_state(queryset, related=MACHINE_USER_STAMPS)
+        validators = Validators(request, latest, total, *users)
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        serialized_machines, paginated = serialize_list(request, queryset, self.serializer_class, self.paginator)
 
         # Machine Stats  
-        total = queryset.count()   
 
-        return Response({  
+        response = {  
             "machine_stats": {  
                 "total": total,  
                         "operational": queryset.filter(  worker__isnull=False).count(),
@@ -146,7 +185,10 @@ class EngineerCreatedMachinesView(ListAPIView):
 
             },  
             "machines": serialized_machines  
-        })
+        }
+        if paginated:
+            response.update(self.paginator.get_paginated_data(serialized_machines, key="machines"))
+        return validators.apply(Response(response))
 
     
 # class MachineDetailView(RetrieveAPIView):
@@ -155,7 +197,7 @@ class EngineerCreatedMachinesView(ListAPIView):
 #     permission_classes = [IsAuthenticated, IsAdmin | IsEngineer | IsWorker]
 #     lookup_field = 'id'
 class MachineDetailView(RetrieveAPIView):
-    queryset = Machine.objects.all()
+    queryset = Machine.objects.select_related("engineer", "worker")
     serializer_class = MachineSerializer
     permission_classes = [IsAuthenticated, IsAdmin | IsEngineer | IsWorker]
     lookup_field = 'id'
@@ -167,23 +209,25 @@ class MachineDetailView(RetrieveAPIView):
         except Machine.DoesNotExist:
             raise NotFound(detail="Machine not found.", code=status.HTTP_404_NOT_FOUND)
 
+        stamps = [machine.updated_at, machine.engineer.updated_at, machine.worker.updated_at if machine.worker else None]
+        validators = Validators(request, *stamps, last_modified=max(filter(None, stamps)))
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
         try:
             # Serialize the machine object
             serializer = self.get_serializer(machine)
 
-            # Get the last inspection date
-            last_inspection = InspectionReport.objects.filter(machine=machine).order_by('-timestamp').first()
-            last_date = last_inspection.timestamp.date() if last_inspection else None
-
-            # Get the next due date using the existing function
-            next_due_date = get_machine_due_date(machine)
+            # Both come from the denormalized columns, no extra queries
+            last_date = localdate(machine.last_inspected_at) if machine.last_inspected_at else None
 
             # Return the response with additional data
-            return Response({
+            return validators.apply(Response({
                 **serializer.data,
                 "last_inspection_date": last_date,
-                "next_due_date": next_due_date,
-            }, status=status.HTTP_200_OK)
+                "next_due_date": machine.next_due_date,
+            }, status=status.HTTP_200_OK))
 
         except Exception as e:
             # Handle unexpected errors
@@ -240,179 +284,237 @@ class DashboardSummaryViewSet(APIView):
     def get(self, request):
         try:
             user = request.user
-            today = now().date()
-
-            if user.user_type == 'worker':  
-                print(f"[INFO] Worker Dashboard Summary requested for: {user}, Date: {today}")
-
-                assigned_machines = Machine.objects.filter(worker=user)
-
-                due_count = 0
-                for machine in assigned_machines:
-                    try:
-                        if get_due_status(machine):
-                            due_count += 1
-                    except Exception as e:
-                        print(f"[ERROR] get_due_status failed for machine ID {machine.id}: {e}")
-
-                
-                pending_count1 =  assigned_machines.filter(
-                    inspectionreport__is_escalated=True
-                )
-                print('pending_count1 ==>' , pending_count1)
-                pending_count = PendingInspection.objects.filter(
-                    machine__in=assigned_machines,
-                    resolved=False
-                ).exclude(
-                    machine__in = pending_count1
-                ).count()
-
-
-                escalation_count = assigned_machines.filter(
-                        inspectionreport__is_escalated=True
-                    ).count()
-                # result_machines = escalated_qs
-                print(f" ## escalated_qs 11 ==> {escalation_count}")
-                # pending_count = PendingInspection.objects.filter(
-                #     machine__in=pending_count1,
-                #     resolved=False
-                # ).count()
-
-
-                # escalation_count = Escalation.objects.filter(
-                #     machine__in=assigned_machines,
-                #     worker=user,
-                #     status='pending'
-                # ).count()
-                
-
-                return Response({
-                    # "role": "worker",
-                    "due": due_count,
-                    "pending": pending_count,
-                    "escalated": escalation_count,
-                }, status=status.HTTP_200_OK)
-
-            elif user.user_type == 'engineer':
-                print(f"[INFO] Engineer Dashboard Summary requested for: {user}, Date: {today}")
-
-                # Get all machines assigned to workers under this engineer
-                assigned_machines = Machine.objects.filter(engineer=user)
-
-                due_count = 0
-                for machine in assigned_machines:
-                    try:
-                        if get_due_status(machine):
-                            due_count += 1
-                    except Exception as e:
-                        print(f"[ERROR] get_due_status failed for machine ID {machine.id}: {e}")
-                pending_count = PendingInspection.objects.filter(
-                    machine__in=assigned_machines,
-                    resolved=False
-                ).count() 
-                escalation_count = assigned_machines.filter(
-                        inspectionreport__is_escalated=True
-                    ).count()
-                print(f"## escalation_count 21==> {escalation_count}")
-                return Response({ 
-                    "due": due_count,
-                    "pending": pending_count,
-                    "escalated": escalation_count,
-                }, status=status.HTTP_200_OK)
-
-            else:
+            if user.user_type not in ('worker', 'engineer'):
                 return Response({"error": "Unsupported user role."}, status=status.HTTP_400_BAD_REQUEST)
 
+            # Per-user cache, invalidated by dashboard/signals.py
+            summary = get_summary(user, lambda: self.build_summary(user, localdate()))
+            return Response(summary, status=status.HTTP_200_OK)
+
         except Exception as e:
             print(f"[ERROR] DashboardSummaryViewSet failed: {e}")
             return Response({
                 "error": "Something went wrong while generating the dashboard summary."
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    
+    def build_summary(self, user, today):
+        if user.user_type == 'worker':
+            print(f"[INFO] Worker Dashboard Summary requested for: {user}, Date: {today}")
+            # Pendings of machines with an escalated report are counted under escalated only
+            return Machine.objects.filter(worker=user).summary(today, exclude_escalated_pendings=True)
+
+        print(f"[INFO] Engineer Dashboard Summary requested for: {user}, Date: {today}")
+        return Machine.objects.filter(engineer=user).summary(today)
+
+
 class EngineerMachineAnalyticsView(APIView):
+    """
+    Fleet totals plus a location x frequency x status breakdown, from one
+    grouped query. ``?location=`` (repeatable) narrows it to some floors.
+    Responses are cached for ENGINEER_ANALYTICS_TTL seconds (0 disables).
+    """
     permission_classes = [IsAuthenticated, IsEngineer]
+    COUNTS = ("total", "assigned", "unassigned", "escalated", "pending")
 
     def get(self, request):
         user = request.user
- 
-        try:
-            # 1. All machines created by this engineer
-            total_machines = Machine.objects.filter(engineer=user)
-
-            # 2. Assigned machines (worker is not null)
-            assigned_count = total_machines.filter(worker__isnull=False).count()
+        locations = sorted(set(request.query_params.getlist("location")))
+        ttl = getattr(settings, "ENGINEER_ANALYTICS_TTL", 30)
+        cache_key = f"engineer-analytics:{user.id}:{'|'.join(locations)}"
 
-            # 3. Not assigned machines
-            unassigned_count = total_machines.filter(worker__isnull=True).count()
+        try:
+            payload = cache.get(cache_key) if ttl else None
+            if payload is None:
+                machines = Machine.objects.filter(engineer=user)
+                if locations:
+                    machines = machines.filter(location__in=locations)
+                breakdown = list(machines.breakdown())
 
-            # 4. Escalated machines (use distinct to avoid double-counting)
-            escalated_count = Escalation.objects.filter(
-                machine__in=total_machines,
-                status='pending'
-            ).values('machine').distinct().count()
+                # Every machine falls in exactly one cell, so the totals are plain sums
+                payload = {field: sum(cell[field] for cell in breakdown) for field in self.COUNTS}
+                payload["breakdown"] = breakdown
+                if ttl:
+                    cache.set(cache_key, payload, ttl)
 
-            return Response({
-                "total": total_machines.count(),
-                "assigned": assigned_count,
-                "unassigned": unassigned_count,
-                "escalated": escalated_count
-            }, status=status.HTTP_200_OK)
+            return Response(payload, status=status.HTTP_200_OK)
 
         except Exception as e:
             print(f"[ERROR] EngineerMachineAnalyticsView failed: {e}")
             return Response({"error": "Something went wrong while fetching machine analytics."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+
+class EngineerHeatmapView(APIView):
+    """
+    Status matrix of all machines of the engineer over ``?start=&end=``
+    (YYYY-MM-DD, default: the last 30 days). Rows follow ``machine_ids``,
+    columns the days of the window; each status is a base64 bitset over the
+    row-major matrix (see dashboard/heatmap.py).
+    """
+    permission_classes = [IsAuthenticated, IsEngineer]
+    MAX_DAYS = 366
+
+    def get(self, request):
+        today = localdate()
+        try:
+            end_date = datetime.strptime(request.query_params.get("end", today.isoformat()), "%Y-%m-%d").date()
+            start_date = datetime.strptime(
+                request.query_params.get("start", (end_date - timedelta(days=29)).isoformat()), "%Y-%m-%d"
+            ).date()
+        except ValueError:
+            return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response({"error": "start must be before or equal to end."}, status=status.HTTP_400_BAD_REQUEST)
+        if (end_date - start_date).days >= self.MAX_DAYS:
+            return Response({"error": f"At most {self.MAX_DAYS} days per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        machines = Machine.objects.filter(engineer=request.user)
+        machine_ids, matrix = status_matrix(machines, start_date, end_date, today)
+        names = dict(machines.values_list("id", "name"))
+
+        return Response({
+            "start": start_date,
+            "end": end_date,
+            "days": matrix.shape[1],
+            "machine_ids": machine_ids.tolist(),
+            "machine_names": [names.get(machine_id) for machine_id in machine_ids.tolist()],
+            "encoding": "bitset",
+            "statuses": encode_bitsets(matrix),
+        }, status=status.HTTP_200_OK)
+
+
+class EngineerComplianceView(APIView):
+    """
+    Compliance time series of the engineer's fleet, read from ComplianceRollup
+    (see rollup_compliance). ``?start=&end=`` (YYYY-MM-DD, default: the last
+    30 days), ``?period=day|week`` and optional ``?group_by=location|frequency``.
+    """
+    permission_classes = [IsAuthenticated, IsEngineer]
+
+    def get(self, request):
+        today = localdate()
+        period = request.query_params.get("period", "day")
+        group_by = request.query_params.get("group_by")
+        try:
+            end_date = datetime.strptime(
+                request.query_params.get("end", (today - timedelta(days=1)).isoformat()), "%Y-%m-%d"
+            ).date()
+            start_date = datetime.strptime(
+                request.query_params.get("start", (end_date - timedelta(days=29)).isoformat()), "%Y-%m-%d"
+            ).date()
+        except ValueError:
+            return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response({"error": "start must be before or equal to end."}, status=status.HTTP_400_BAD_REQUEST)
+        if period not in ("day", "week") or group_by not in (None, "location", "frequency"):
+            return Response(
+                {"error": "period must be day or week; group_by must be location or frequency."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        series = compliance_series(request.user, start_date, end_date, period, group_by)
+        return Response({
+            "start": start_date,
+            "end": end_date,
+            "period": period,
+            "group_by": group_by,
+            "series": series,
+        }, status=status.HTTP_200_OK)
+
+
+class EngineerLatencyView(APIView):
+    """
+    Inspection latency percentiles (hours from the start of the due date) per
+    worker, machine and location, and reports per worker per day, over the
+    reports of the engineer's machines with a due date in ``?start=&end=``
+    (YYYY-MM-DD, default: the last 30 days).
+    """
+    permission_classes = [IsAuthenticated, IsEngineer]
+
+    def get(self, request):
+        today = localdate()
+        try:
+            end_date = datetime.strptime(request.query_params.get("end", today.isoformat()), "%Y-%m-%d").date()
+            start_date = datetime.strptime(
+                request.query_params.get("start", (end_date - timedelta(days=29)).isoformat()), "%Y-%m-%d"
+            ).date()
+        except ValueError:
+            return Response({"error": "Invalid date format. Use YYYY-MM-DD."}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response({"error": "start must be before or equal to end."}, status=status.HTTP_400_BAD_REQUEST)
+
+        reports = InspectionReport.objects.filter(
+            machine__engineer=request.user, due_date__range=(start_date, end_date)
+        )
+        return Response({
+            "start": start_date,
+            "end": end_date,
+            **latency_report(reports),
+        }, status=status.HTTP_200_OK)
+
+
 # ---------------  get machines which are due to day ----------------
 
  
 
-class DueMachinesView(APIView):
+class DueMachinesView(FastRendererMixin, APIView):
     permission_classes = [IsAuthenticated, IsWorker]
 
     def get(self, request):
         try:
             user = request.user
-            today = now().date()
+            today = localdate()
             view_type = request.query_params.get('type', 'due_today')  # default to 'due'
             print(f"[INFO] Worker Machine List requested for: {user}, Type: {view_type}, Date: {today}")
 
             # Get machines assigned to the worker
             try:
-                assigned_machines = Machine.objects.filter(worker=user)
+                assigned_machines = Machine.objects.filter(worker=user).select_related("engineer", "worker")
             except DatabaseError as e:
                 print(f"[DB ERROR] Failed to fetch assigned machines: {e}")
                 return Response({"error": "Unable to fetch assigned machines."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
             result_machines = []
+            # Opt-in keyset pagination (?page_size= / ?cursor=); None means "send everything"
+            paginator = KeysetPagination()
 
             if view_type == 'due_today':
-                for machine in assigned_machines:
-                    try:
-                        if get_due_status(machine):
-                            result_machines.append(machine)
-                    except Exception as e:
-                        print(f"[ERROR] get_due_status failed for machine ID {machine.id}: {e}")
+                # Same definition of "due" as the dashboard summary count
+                result_machines = assigned_machines.due(today)
 
             elif view_type == 'pending':
                 try:
                     pending_qs = PendingInspection.objects.filter(
                         machine__in=assigned_machines,
                         resolved=False
-                    ).select_related('machine')
+                    ).select_related('machine__engineer', 'machine__worker')
+                    pending_qs = only_selected(pending_qs, MachineWithDueDateSerializer, request, prefix="machine__")
+                    rows = None
+                    if fast_read_path_enabled():
+                        rows = ValuesRows(
+                            MachineWithDueDateSerializer, {"request": request}, prefix="machine__",
+                            methods={"due_date": lambda row: row["date_due"]},
+                        )
+                        pending_qs = rows.values(pending_qs, "date_due", *paginator.ordering)
+                    page = paginator.paginate_queryset(pending_qs, request, self)
+                    if page is not None:
+                        pending_qs = page
 
                     # result_machines = assigned_machines.filter(
                     #     id__in=pending_qs.values_list('machine_id', flat=True).distinct(),
                     # ).distinct()
-                    results = []
-                    for pending in pending_qs:
-                        serializer = MachineWithDueDateSerializer(
-                            pending.machine,
-                            context={"due_date": pending.date_due}
-                        )
-                        results.append(serializer.data)
+                    if rows is not None:
+                        results = rows.to_representation(pending_qs)
+                    else:
+                        # One list serializer; each machine carries the due date of its pending
+                        pending_machines = []
+                        for pending in pending_qs:
+                            pending.machine.pending_due_date = pending.date_due
+                            pending_machines.append(pending.machine)
+                        results = MachineWithDueDateSerializer(pending_machines, many=True, context={"request": request}).data
 
                     print(f'### results ==> ', results)
+                    if page is not None:
+                        return paginator.get_paginated_response(results)
                     return Response(results, status=status.HTTP_200_OK)
                     
 
@@ -437,8 +539,14 @@ class DueMachinesView(APIView):
                 return Response({"error": "Invalid type. Use 'due', 'pending', or 'escalated'."},
                                 status=status.HTTP_400_BAD_REQUEST)
 
-            serializer = MachineWithDueDateSerializer(result_machines, many=True, context={"due_date": today})
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            result_machines = only_selected(result_machines, MachineWithDueDateSerializer, request)
+            data, paginated = serialize_list(
+                request, result_machines, MachineWithDueDateSerializer, paginator,
+                context={"due_date": today, "request": request}, methods={"due_date": lambda row: today},
+            )
+            if paginated:
+                return paginator.get_paginated_response(data)
+            return Response(data, status=status.HTTP_200_OK)
 
         except Exception as e:
             print(f"[UNEXPECTED ERROR] DueMachinesView failed: {e}")
@@ -447,60 +555,117 @@ class DueMachinesView(APIView):
 
  
 class MachineScheduleView(APIView):
+    """
+    Inspection calendar of one machine.
+
+    ``?month=&year=`` returns one month (default: the current one) as a list.
+    ``?from=YYYY-MM&to=YYYY-MM`` returns every month of the range as a list
+    of ``{"month": "YYYY-MM", "schedule": [...]}``. Either way the reports and
+    open pendings of the whole window are fetched in two queries.
+    """
     permission_classes = [IsAuthenticated]
+    MAX_MONTHS = 24
 
     def get(self, request, machine_id):
-        machine = get_object_or_404(Machine, id=machine_id)
         today = now().date()
+        month_range = "from" in request.query_params or "to" in request.query_params
         try:
-            # Get month and year from query params, fallback to current
-            month = int(request.query_params.get("month", today.month))
-            year = int(request.query_params.get("year", today.year))
-
-            # Start and end of requested month
-            month_start = date(year, month, 1)
-            last_day = calendar.monthrange(year, month)[1]
-            month_end = date(year, month, last_day)
-
-            if machine.inspection_frequency == "daily":
-                return Response(self.get_daily_schedule(machine, today, month_start, month_end))
-            elif machine.inspection_frequency == "weekly":
-                return Response(self.get_weekly_schedule(machine, today, month_start, month_end))
-            elif machine.inspection_frequency == "monthly":
-                return Response(self.get_monthly_schedule(machine, today, month_start, month_end))
+            if month_range:
+                first = datetime.strptime(request.query_params.get("from", today.strftime("%Y-%m")), "%Y-%m").date()
+                last = datetime.strptime(request.query_params.get("to", first.strftime("%Y-%m")), "%Y-%m").date()
             else:
-                return Response({"message": "Unsupported inspection frequency"}, status=status.HTTP_400_BAD_REQUEST)
+                # Get month and year from query params, fallback to current
+                first = last = date(
+                    int(request.query_params.get("year", today.year)),
+                    int(request.query_params.get("month", today.month)),
+                    1,
+                )
         except ValueError:
             return Response({"error": "Invalid month or year provided."}, status=status.HTTP_400_BAD_REQUEST)
 
-    def get_daily_schedule(self, machine, today, start_date, end_date):
-        schedule = []
-        current_day = start_date
-        day_count = 1
-
-        while current_day <= end_date:
-            label = f"Day {day_count}"
-
-            if current_day > today:
-                status_label = "scheduled"
-            elif InspectionReport.objects.filter(machine=machine, due_date=current_day).exists():
-                status_label = "completed"
-            elif PendingInspection.objects.filter(machine=machine, date_due=current_day, resolved=False).exists():
-                status_label = "pending"
+        months = [
+            divmod(index, 12)
+            for index in range(first.year * 12 + first.month - 1, last.year * 12 + last.month)
+        ]
+        if not months:
+            return Response({"error": "'from' must not be after 'to'."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(months) > self.MAX_MONTHS:
+            return Response({"error": f"At most {self.MAX_MONTHS} months per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        window_start = month_bounds(months[0][0], months[0][1] + 1)[0]
+        window_end = month_bounds(months[-1][0], months[-1][1] + 1)[1]
+
+        def window(model, date_field, aggregate):
+            rows = model.objects.filter(machine=OuterRef("pk"), **{f"{date_field}__range": [window_start, window_end]})
+            return Subquery(rows.order_by().values("machine").annotate(value=aggregate("updated_at")).values("value"))
+
+        # One query: the machine plus the state of its reports and pendings in the window
+        machine = get_object_or_404(
+            Machine.objects.annotate(
+                reports_latest=window(InspectionReport, "due_date", Max),
+                reports_count=window(InspectionReport, "due_date", Count),
+                pendings_latest=window(PendingInspection, "date_due", Max),
+                pendings_count=window(PendingInspection, "date_due", Count),
+            ),
+            id=machine_id,
+        )
+        validators = Validators(
+            request, machine.updated_at, machine.reports_latest, machine.reports_count,
+            machine.pendings_latest, machine.pendings_count,
+        )
+        not_modified = validators.not_modified(request)
+        if not_modified is not None:
+            return not_modified
+
+        rule = machine_rule(machine)
+        if rule.freq not in (DAILY, WEEKLY, MONTHLY):
+            return Response({"message": "Unsupported inspection frequency"}, status=status.HTTP_400_BAD_REQUEST)
+
+        reported = set(InspectionReport.objects.filter(
+            machine=machine, due_date__range=[window_start, window_end]
+        ).values_list("due_date", flat=True))
+        pending = set(PendingInspection.objects.filter(
+            machine=machine, date_due__range=[window_start, window_end], resolved=False
+        ).values_list("date_due", flat=True))
+
+        anchor = machine_anchor(machine)
+        calendars = []
+        for year, month_index in months:
+            month_start, month_end = month_bounds(year, month_index + 1)
+            due_dates = as_dates(occurrences(rule, month_start, month_end, anchor))
+            if rule.freq == DAILY:
+                schedule = self.get_daily_schedule(today, due_dates, reported, pending)
+            elif rule.freq == WEEKLY:
+                schedule = self.get_weekly_schedule(today, month_start, month_end, due_dates, reported, pending)
             else:
-                status_label = "missed" if current_day < today else "scheduled"
-
-            schedule.append({
-                "schedule": label,
-                "status": status_label
-            })
+                schedule = self.get_monthly_schedule(today, due_dates, reported, pending)
+            calendars.append({"month": month_start.strftime("%Y-%m"), "schedule": schedule})
 
-            current_day += timedelta(days=1)
-            day_count += 1
+        if month_range:
+            return validators.apply(Response(calendars))
+        return validators.apply(Response(calendars[0]["schedule"]))
 
-        return schedule
+    @staticmethod
+    def get_status(today, due_date, days, reported, pending):
+        """Status of a due date, given the days that count for it and the reported / pending date sets."""
+        if due_date > today:
+            return "scheduled"
+        if any(day in reported for day in days):
+            return "completed"
+        if any(day in pending for day in days):
+            return "pending"
+        return "missed" if due_date < today else "scheduled"
+
+    def get_daily_schedule(self, today, due_dates, reported, pending):
+        return [
+            {
+                "schedule": f"Day {due_date.day}",
+                "status": self.get_status(today, due_date, [due_date], reported, pending)
+            }
+            for due_date in due_dates
+        ]
 
-    def get_weekly_schedule(self, machine, today, start_date, end_date):
+    def get_weekly_schedule(self, today, start_date, end_date, due_dates, reported, pending):
         schedule = []
         week_num = 1
         current_start = start_date
@@ -510,43 +675,29 @@ class MachineScheduleView(APIView):
             week_end = min(week_start + timedelta(days=6), end_date)
             label = f"Week {week_num} ({week_start.strftime('%b %-d')}-{week_end.strftime('%-d')})"
 
-            if week_end > today:
-                status_label = "scheduled"
-            elif InspectionReport.objects.filter(machine=machine, due_date__range=[week_start, week_end]).exists():
-                status_label = "completed"
-            elif PendingInspection.objects.filter(machine=machine, date_due__range=[week_start, week_end], resolved=False).exists():
-                status_label = "pending"
-            else:
-                status_label = "missed" if week_end < today else "scheduled"
-
-            schedule.append({
-                "schedule": label,
-                "status": status_label
-            })
+            # A week is judged by its last due date; weeks without one (the off weeks
+            # of INTERVAL=2, the days before the machine existed) aren't listed
+            week_due = [d for d in due_dates if week_start <= d <= week_end]
+            if week_due:
+                week_days = [week_start + timedelta(days=i) for i in range((week_end - week_start).days + 1)]
+                schedule.append({
+                    "schedule": label,
+                    "status": self.get_status(today, week_due[-1], week_days, reported, pending)
+                })
 
             current_start += timedelta(weeks=1)
             week_num += 1
 
         return schedule
 
-
-    def get_monthly_schedule(self, machine, today, start_date, end_date):
-    # You can customize this to use any fixed day, e.g., 1st, 15th, or last day of the month.
-        due_date = end_date  # 1st of the month
-
-        if due_date > today:
-            status_label = "scheduled"
-        elif InspectionReport.objects.filter(machine=machine, due_date=due_date).exists():
-            status_label = "completed"
-        elif PendingInspection.objects.filter(machine=machine, date_due=due_date, resolved=False).exists():
-            status_label = "pending"
-        else:
-            status_label = "missed" if due_date < today else "scheduled"
-
-        return [{
-            "schedule": due_date,
-            "status": status_label
-        }]
+    def get_monthly_schedule(self, today, due_dates, reported, pending):
+        return [
+            {
+                "schedule": due_date,
+                "status": self.get_status(today, due_date, [due_date], reported, pending)
+            }
+            for due_date in due_dates
+        ]
 
 
 # class AddInspectionReportView(APIView):
@@ -607,6 +758,7 @@ class MachineScheduleView(APIView):
 #             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 class InspectionReportView(APIView):
 
+    @idempotent
     def post(self, request):
         try:
             user = request.user  # Assuming authenticated worker
@@ -635,20 +787,10 @@ class InspectionReportView(APIView):
                 machine = Machine.objects.get(id=machine_id)
             except Machine.DoesNotExist:
                 return Response({"error": "Machine not found."}, status=status.HTTP_404_NOT_FOUND)
-            if machine.worker != user:
+            if machine.worker_id != user.id:
                 return Response({"error": "You are not assigned to this machine."}, status=status.HTTP_403_FORBIDDEN)
 
 
-            already_reported = InspectionReport.objects.filter(
-                machine=machine,
-                worker=user,
-                due_date=due_date
-            ).exists()
-
-            if already_reported:
-                return Response({"message": "Inspection already done."}, status=status.HTTP_400_BAD_REQUEST)
-
-
             # Fetch and validate due date from PendingInspection
             # try:
             #     pending_inspection = PendingInspection.objects.get(machine=machine, resolved=False)
@@ -683,15 +825,12 @@ class InspectionReportView(APIView):
 
             serializer = InspectionReportSerializer(data=data)
             if serializer.is_valid():
-                serializer.save()
-
                 try:
-                    pending = PendingInspection.objects.get(machine=machine, date_due=due_date, resolved=False)
-                    pending.resolved = True
-                    pending.save()
-                except PendingInspection.DoesNotExist:
-                    pass  # Optional: return a warning or silently ignore
-
+                    with transaction.atomic():
+                        self.save_report(serializer, machine, due_date)
+                except IntegrityError:
+                    # unique (machine, due_date): a retry or a concurrent submission got there first
+                    return Response({"message": "Inspection already done."}, status=status.HTTP_400_BAD_REQUEST)
 
                 # Optionally, mark pending inspection as resolved automatically
                 # pending_inspection.resolved = True
@@ -704,103 +843,64 @@ class InspectionReportView(APIView):
             print(e)
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @staticmethod
+    def save_report(serializer, machine, due_date):
+        """Report, pending, due columns and occurrence; call inside one transaction."""
+        report = serializer.save()
 
+        try:
+            pending = PendingInspection.objects.get(machine=machine, date_due=due_date, resolved=False)
+            pending.resolved = True
+            pending.save()
+        except PendingInspection.DoesNotExist:
+            pass  # Optional: return a warning or silently ignore
 
+        # Keep last_inspected_at / next_due_date in step with the report
+        Machine.objects.select_for_update().get(id=machine.id).record_inspection(report.timestamp)
+        DueOccurrence.objects.mark([(machine.id, due_date)], DueOccurrence.Status.COMPLETED)
+        return report
 
-# ---------------  get due status ----------------
-def get_due_status(machine):
-    today = date.today()
-    #  custom date for testing
-    # today = datetime(2025, 4, 30).date()
-    if machine.inspection_frequency == 'daily':
-        print('in  ==>', 'daily')
-        inspection_done_today = InspectionReport.objects.filter(
-            machine=machine,
-            timestamp__date=today
-        ).exists()
-        print('## inspection_done_today ==>', inspection_done_today)
-        return not inspection_done_today  # Due if not done today
-    elif machine.inspection_frequency == 'weekly':
-        print('in  ==>', 'weekly')
-        # # Get the start (Monday) and end (Sunday) of the current week
-        # start_of_week = today - timedelta(days=today.weekday())  # Monday
-        # end_of_week = start_of_week + timedelta(days=5)          # Sunday
-
-        # inspection_done_this_week = InspectionReport.objects.filter(
-        #     machine=machine,
-        #     timestamp__date__gte=start_of_week,
-        #     timestamp__date__lte=today
-        # ).exists()
-
-        # if inspection_done_this_week:
-        #     return False  # Already inspected this week
-
-        # if today != end_of_week:
-        #     return False  # Not due yet
-
-        # return True  # Due today (last day of the week, no inspection yet)
-
-        # Define the current week (Monday to Saturday)
-        start_of_week = today - timedelta(days=today.weekday())  # Monday
-        end_of_week = start_of_week + timedelta(days=5)  # Saturday
-
-        # Check if inspection has already been done this week
-        inspection_done_this_week = InspectionReport.objects.filter(
-            machine=machine,
-            timestamp__date__range=(start_of_week, today)
-        ).exists()
-
-        if inspection_done_this_week:
-            return False  # Inspection already done
-
-        if today == end_of_week:
-            return True  # Due today (Saturday) and no inspection yet
-
-        return False  # Not due yet
-
-    elif machine.inspection_frequency == 'monthly':
-        print('in  ==>', 'monthly')
-        first_day_of_month = today.replace(day=1)
-        last_day = monthrange(today.year, today.month)[1]
-        last_day_of_month = today.replace(day=last_day)
-
-        inspection_done_this_month = InspectionReport.objects.filter(
-            machine=machine,
-            timestamp__date__gte=first_day_of_month,
-            timestamp__date__lte=today
-        ).exists()
-
-        if inspection_done_this_month:
-            return False
-
-        if today != last_day_of_month:
-            return False
-
-        return True  # Due today (last day of the month, no inspection yet)
 
 
-def get_machine_due_date(machine):
-    today = date.today()
 
-    if machine.inspection_frequency == 'daily':
-        # It's always due today unless done already
-        return today
+class InspectionBatchView(APIView):
+    """
+    Submit many inspection reports at once (offline devices).
 
-    elif machine.inspection_frequency == 'weekly':
-        # End of the current week (assuming Sunday is last day of the week)
-        start_of_week = today - timedelta(days=today.weekday())  # Monday
-        due_date = start_of_week + timedelta(days=5)  # Saturday
-        return due_date
+    Body: a list of report objects (same fields as InspectionReportView), or
+    ``{"reports": [...]}``. Every item gets a result, in order: ``created``
+    with the report, or ``failed`` with the reason; the valid ones are saved
+    even if others fail. See dashboard/inspections.py.
+    """
+    permission_classes = [IsAuthenticated, IsWorker]
 
-    elif machine.inspection_frequency == 'monthly':
-        # Get the last day of the current month
-        last_day = monthrange(today.year, today.month)[1]
-        due_date = today.replace(day=last_day)
-        return due_date
+    @idempotent
+    def post(self, request):
+        items = request.data.get("reports") if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Send a non-empty list of reports."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_BATCH:
+            return Response({"error": f"At most {MAX_BATCH} reports per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = submit_batch(request.user, items)
+        created = sum(result["status"] == "created" for result in results)
+        logger.info("Batch inspection from %s: %d/%d created", request.user, created, len(results))
+        return Response({
+            "created": created,
+            "failed": len(results) - created,
+            "results": results,
+        }, status=status.HTTP_200_OK)
 
 
 class CheckPendingAPIView(APIView):
-    # Optional: add authentication or a secret token check
+    """
+    Queue a check_pending run and return its job id right away.
+    Poll check-pending/<job_id>/ for progress counters and, once it has
+    finished, the output.
+
+    With ?stream=1 the run happens during the request instead and the
+    response is NDJSON: one line per processed day, then a "done" line.
+    """
     permission_classes = [IsAuthenticated, IsAdmin]  # Optional
 
     def post(self, request):
@@ -808,33 +908,55 @@ class CheckPendingAPIView(APIView):
         start = request.data.get("start")
         end = request.data.get("end")
 
-        # Capture stdout/stderr from management command
-        out = StringIO()
-        err = StringIO()
-
-        cmd_options = {
-            'simple': True,  # Disable color codes
-        }
+        cmd_options = {}
         if days:
-            cmd_options["days"] = int(days)
+            try:
+                cmd_options["days"] = int(days)
+            except (TypeError, ValueError):
+                return Response({"error": "'days' must be an integer."}, status=400)
         elif start and end:
             cmd_options["start"] = start
             cmd_options["end"] = end
         else:
             return Response({"error": "Please provide either 'days' or both 'start' and 'end'."}, status=400)
 
-        try:
-            call_command("check_pending", stdout=out, stderr=err, **cmd_options)
-            return Response({
-                "success": True,
-                "output": out.getvalue()
-            }, status=200)
-        except Exception as e:
-            return Response({
-                "success": False,
-                "error": str(e),
-                "details": err.getvalue()
-            }, status=500)
+        if request.query_params.get("stream") in ("1", "true"):
+            response = StreamingHttpResponse(stream_check_pending(cmd_options), content_type="application/x-ndjson")
+            response["Cache-Control"] = "no-cache"
+            response["X-Accel-Buffering"] = "no"  # don't let nginx buffer the progress lines
+            return response
+
+        job = submit_check_pending(cmd_options, user=request.user)
+        return Response({
+            "success": True,
+            "job_id": job.id,
+            "status": job.status,
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class SyncView(APIView):
+    """
+    Delta sync for offline devices: ``?token=`` from the previous response
+    (omit it for a full snapshot). See dashboard/sync.py for the contract.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(changes(request.user, request.query_params.get("token")), status=status.HTTP_200_OK)
+
+
+class CheckPendingJobStatusView(APIView):
+    """
+    State of a queued check_pending job. While it runs, days_done, days_total
+    and pendings_created advance; output, error and result stay empty until
+    the job finishes (the per-day lines are written once, with the result).
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request, job_id):
+        fail_stale_jobs()
+        job = get_object_or_404(CheckPendingJob, id=job_id)
+        return Response(CheckPendingJobSerializer(job).data, status=status.HTTP_200_OK)
 
 
 def remove_ansi(text):
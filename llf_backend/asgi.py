@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "llf_backend.settings")
 
 application = get_asgi_application()
+
+# Periodic maintenance (pending detection etc.), see dashboard/scheduler.py
+from dashboard import scheduler  # noqa: E402
+
+scheduler.start()
@@ -0,0 +1,55 @@
+"""
+Conditional GET (ETag / Last-Modified) for read endpoints.
+
+A view computes a cheap state for the rows behind its response, usually
+``scope_state(queryset)``: ``Max("updated_at")`` and ``Count("pk")`` in one
+aggregate query. ``Validators`` turns that into an ETag and answers 304 Not
+Modified before anything is serialized when the client's copy is current;
+otherwise the view builds its response as usual and stamps the headers on it.
+
+The ETag also covers the full path (query string included), the user, the
+negotiated format and the local date, since lists and schedules depend on all
+of them. A max/count pair notices deletions where a timestamp alone would not,
+so Last-Modified / If-Modified-Since are only used for single objects. When a
+payload shows fields of related rows (a machine's engineer_name), their
+timestamps go into the state too.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.timezone import localdate
+
+
+def scope_state(queryset, field="updated_at", related=()):
+    """
+    ``(latest field value, row count)`` of ``queryset`` in one query, followed
+    by the latest value of each ``related`` lookup (e.g. "engineer__updated_at")
+    for payloads that embed fields of related rows.
+    """
+    state = queryset.order_by().aggregate(
+        latest=Max(field), count=Count("pk"), **{f"related_{i}": Max(lookup) for i, lookup in enumerate(related)}
+    )
+    return (state["latest"], state["count"], *(state[f"related_{i}"] for i in range(len(related))))
+
+
+class Validators:
+    def __init__(self, request, *state, last_modified=None):
+        renderer = getattr(request, "accepted_renderer", None)
+        raw = repr((
+            request.get_full_path(), request.user.pk, getattr(renderer, "format", None), localdate(), *state,
+        ))
+        self.etag = f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+        self.last_modified = int(last_modified.timestamp()) if last_modified else None
+
+    def not_modified(self, request):
+        """A 304 response if the client already has this representation, else None."""
+        return get_conditional_response(request, etag=self.etag, last_modified=self.last_modified)
+
+    def apply(self, response):
+        if 200 <= response.status_code < 300:
+            response["ETag"] = self.etag
+            if self.last_modified is not None:
+                response["Last-Modified"] = http_date(self.last_modified)
+        return response
@@ -0,0 +1,111 @@
+"""
+Serializer-free read path for large lists.
+
+``ValuesRows`` inspects a ModelSerializer once and turns ``.values()`` rows
+into the exact dicts the serializer would have produced: same keys, same
+order, same formatting for dates and datetimes, and the same omission of a
+nested read-only field whose relation is null (DRF's SkipField). Fields
+dropped by ``?fields=`` / ``?exclude=`` (SparseFieldsMixin) stay dropped.
+
+SerializerMethodFields can't be read from the database; pass their values
+through ``methods`` as callables taking the row.
+
+Views that use ``serialize_list`` also take ``FastRendererMixin``, which
+swaps in the orjson-backed FastJSONRenderer while FAST_READ_PATH is on.
+"""
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.renderers import JSONRenderer
+
+from .renderers import FastJSONRenderer
+
+# Types whose to_representation() is the identity on the values() result
+_PLAIN = (
+    serializers.CharField, serializers.ChoiceField, serializers.IntegerField,
+    serializers.BooleanField, PrimaryKeyRelatedField,
+)
+
+
+def fast_read_path_enabled():
+    return getattr(settings, "FAST_READ_PATH", False)
+
+
+class FastRendererMixin:
+    """Render JSON with FastJSONRenderer instead of JSONRenderer while FAST_READ_PATH is on."""
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if not fast_read_path_enabled():
+            return renderers
+        return [FastJSONRenderer() if type(renderer) is JSONRenderer else renderer for renderer in renderers]
+
+
+class ValuesRows:
+    def __init__(self, serializer_class, context=None, prefix="", methods=None):
+        serializer = serializer_class(context=context or {})
+        methods = methods or {}
+        self.prefix = prefix
+        self.plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                self.plan.append((name, None, methods[name], None))
+                continue
+            key = prefix + "__".join(field.source_attrs)
+            convert = None if isinstance(field, _PLAIN) else field.to_representation
+            # A nested source through a null relation is skipped, not rendered as null
+            relation = None
+            if len(field.source_attrs) > 1 and not field.allow_null and not field.required:
+                relation = prefix + "__".join(field.source_attrs[:-1])
+            self.plan.append((name, key, convert, relation))
+
+    def lookups(self, *extra):
+        keys = []
+        for _, key, _, relation in self.plan:
+            keys.extend(k for k in (key, relation) if k is not None)
+        return list(dict.fromkeys([*keys, *extra]))
+
+    def values(self, queryset, *extra):
+        """``queryset.values()`` with every column the plan (and ``extra``, e.g. cursor keys) needs."""
+        return queryset.values(*self.lookups(*extra))
+
+    def to_representation(self, rows):
+        data = []
+        for row in rows:
+            item = {}
+            for name, key, convert, relation in self.plan:
+                if key is None:
+                    item[name] = convert(row)
+                    continue
+                if relation is not None and row[relation] is None:
+                    continue
+                value = row[key]
+                if value is None:
+                    item[name] = None
+                else:
+                    item[name] = convert(value) if convert else value
+            data.append(item)
+        return data
+
+
+def serialize_list(request, queryset, serializer_class, paginator=None, context=None, methods=None):
+    """
+    Serialize ``queryset`` (or the page of it the paginator cuts, if any)
+    through ``serializer_class``, or through ValuesRows when FAST_READ_PATH
+    is on. Returns ``(data, paginated)``.
+    """
+    context = context if context is not None else {"request": request}
+    rows = None
+    if fast_read_path_enabled():
+        rows = ValuesRows(serializer_class, context, methods=methods)
+        queryset = rows.values(queryset, *(paginator.ordering if paginator else ()))
+
+    page = paginator.paginate_queryset(queryset, request) if paginator else None
+    items = queryset if page is None else page
+    if rows is not None:
+        data = rows.to_representation(items)
+    else:
+        data = serializer_class(items, many=True, context=context).data
+    return data, page is not None
@@ -0,0 +1,91 @@
+"""
+Sparse fieldsets: ``?fields=id,name`` / ``?exclude=engineer_name`` /
+``?compact=1`` on serializers that use SparseFieldsMixin.
+
+The serializer drops the fields the client did not ask for, and
+``only_selected`` pushes the same choice down to the queryset with
+``only()`` / ``select_related()``, so unused columns and joins are neither
+fetched nor serialized. Unknown field names are ignored.
+"""
+from django.core.exceptions import FieldDoesNotExist
+
+
+def _names(value):
+    return {name.strip() for name in value.split(",") if name.strip()} if value else set()
+
+
+def requested_fields(request, compact_fields=None):
+    """``(selected or None, excluded)`` field names from the query string."""
+    if request is None:
+        return None, set()
+    params = request.query_params
+    selected = _names(params.get("fields")) or None
+    if selected is None and compact_fields and params.get("compact") in ("1", "true"):
+        selected = set(compact_fields)
+    return selected, _names(params.get("exclude"))
+
+
+class SparseFieldsMixin:
+    """Serializer mixin; ``compact_fields`` is the field set served for ``?compact=1``."""
+    compact_fields = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected, excluded = requested_fields(self.context.get("request"), self.compact_fields)
+        for name in list(self.fields):
+            if (selected is not None and name not in selected) or name in excluded:
+                self.fields.pop(name)
+
+
+def _field_path(model, attrs):
+    """``["engineer", "username"]`` -> ``("engineer__username", "engineer")`` if both are model fields."""
+    relations = []
+    for index, attr in enumerate(attrs):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None, None
+        if not field.concrete:
+            return None, None
+        if field.is_relation and index < len(attrs) - 1:
+            model = field.related_model
+            relations.append(attr)
+    return "__".join(attrs), "__".join(relations) or None
+
+
+def only_selected(queryset, serializer_class, request, prefix=""):
+    """
+    Restrict ``queryset`` to the columns (and joins) the sparse serializer will
+    read. ``prefix`` addresses the serialized model through a relation, e.g.
+    ``"machine__"`` for a PendingInspection queryset serialized as machines.
+    Without ``?fields=`` / ``?exclude=`` / ``?compact=`` the queryset is
+    returned unchanged.
+    """
+    selected, excluded = requested_fields(request, getattr(serializer_class, "compact_fields", None))
+    if selected is None and not excluded:
+        return queryset
+
+    model = queryset.model
+    base = model
+    for attr in filter(None, prefix.split("__")):
+        base = base._meta.get_field(attr).related_model
+
+    columns = {f"{prefix}{base._meta.pk.name}"}
+    joins = {prefix.rstrip("_")} if prefix else set()
+    for field in serializer_class(context={"request": request}).fields.values():
+        if field.source == "*":
+            continue  # method / whole-object fields read nothing specific
+        path, relation = _field_path(base, field.source_attrs)
+        if path is None:
+            return queryset  # property or method source: can't tell what it reads
+        columns.add(f"{prefix}{path}")
+        if relation:
+            joins.add(f"{prefix}{relation}")
+
+    if prefix:
+        # fields of the outer model the view itself reads
+        columns.update(f.name for f in model._meta.concrete_fields if not f.is_relation)
+    queryset = queryset.select_related(None)
+    if joins:  # select_related() without arguments would follow every FK
+        queryset = queryset.select_related(*joins)
+    return queryset.only(*columns)
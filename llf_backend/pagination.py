@@ -0,0 +1,111 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+Pages are cut on an indexed, unique ordering such as (created_at, id): the
+next page is ``WHERE (created_at, id) > (last created_at, last id)``, so a
+deep page costs the same as the first one. The cursor is an opaque base64
+token holding the key of the last row served.
+
+Opt-in: pagination only kicks in when the request carries ``?page_size=`` or
+``?cursor=``. Otherwise ``paginate_queryset`` returns None and the view
+answers with the full, unpaginated list it always did.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    ordering = ("created_at", "id")
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        self.next_cursor = None
+        self.request = None
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, obj):
+        values = []
+        for field in self.ordering:
+            value = obj[field] if isinstance(obj, dict) else getattr(obj, field)  # values() rows too
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, token):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(token.encode()))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                datetime.fromisoformat(value) if isinstance(value, str) else value
+                for value in values
+            ]
+        except (ValueError, TypeError):
+            raise NotFound("Invalid cursor.")
+
+    def after(self, values):
+        """Rows strictly after ``values`` in self.ordering (ascending)."""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            step = Q(**{f"{field}__gt": values[index]})
+            for previous, value in zip(self.ordering[:index], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        fields, deferring = queryset.query.deferred_loading
+        if fields and not deferring and not queryset.query.values_select:
+            # only() in effect (sparse fieldsets): the cursor still needs the keys
+            queryset = queryset.only(*fields, *self.ordering)
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            queryset = queryset.filter(self.after(self.decode_cursor(token)))
+
+        rows = list(queryset[:page_size + 1])
+        page = rows[:page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if len(rows) > page_size else None
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data, key="results"):
+        return {"next": self.get_next_link(), "cursor": self.next_cursor, key: data}
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+
+class DateJoinedKeysetPagination(KeysetPagination):
+    """For user lists."""
+    ordering = ("date_joined", "id")
@@ -0,0 +1,51 @@
+"""
+JSON renderer backed by orjson when it is installed.
+
+For compact, UTF-8 responses without floats the output is byte-for-byte
+what DRF's JSONRenderer produces: same separators, non-ASCII left as is,
+U+2028/U+2029 escaped. orjson writes floats differently (``1e16`` for
+``1e+16``, ``0.00001`` for ``1e-05``), so any payload containing a float, and
+anything else orjson can't encode the same way (indented output, huge ints),
+goes through the stock renderer.
+
+Only the FAST_READ_PATH list views use it (``FastRendererMixin``).
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _has_float(data):
+    if isinstance(data, float):
+        return True
+    if isinstance(data, dict):
+        return any(_has_float(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(_has_float(value) for value in data)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None or _has_float(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        encoder = self.encoder_class()
+
+        def default(obj):
+            value = encoder.default(obj)
+            if _has_float(value):  # e.g. Decimal with COERCE_DECIMAL_TO_STRING off
+                raise TypeError
+            return value
+
+        try:
+            # Native datetime/UUID handling differs from DRF's encoder, so hand those to it
+            ret = orjson.dumps(data, default=default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
@@ -195,4 +195,64 @@ AUTH_USER_MODEL = 'authentication.CustomUser'
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 
+# Cache (dashboard summaries). Local memory is per process: with several web
+# workers point CACHE_BACKEND at a shared backend (file-based, Redis, ...) so
+# invalidations reach every worker.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "llf-backend"),
+    }
+}
+DASHBOARD_SUMMARY_TTL = int(os.environ.get("DASHBOARD_SUMMARY_TTL", 60))  # seconds
+ENGINEER_ANALYTICS_TTL = int(os.environ.get("ENGINEER_ANALYTICS_TTL", 30))  # seconds, 0 disables
+
+# Large list endpoints serialize straight from values() rows (llf_backend/fastpath.py)
+FAST_READ_PATH = os.environ.get("FAST_READ_PATH", "False").lower() == "true"
+
+# Delta sync (dashboard/sync.py): tombstones older than this are pruned and
+# force a full sync; a full sync carries this many days of reports.
+SYNC_TOMBSTONE_DAYS = int(os.environ.get("SYNC_TOMBSTONE_DAYS", 30))
+SYNC_REPORT_DAYS = int(os.environ.get("SYNC_REPORT_DAYS", 30))
+
+# Responses stored for Idempotency-Key replays (dashboard/idempotency.py)
+IDEMPOTENCY_KEY_HOURS = int(os.environ.get("IDEMPOTENCY_KEY_HOURS", 24))
+# A key still unanswered after this long belongs to a request that died; retries take it over
+IDEMPOTENCY_IN_FLIGHT_SECONDS = int(os.environ.get("IDEMPOTENCY_IN_FLIGHT_SECONDS", 120))
+
+# check_pending jobs queued from the API (dashboard/jobs.py): a queued or running
+# job without progress for this long lost its process and is marked failed.
+CHECK_PENDING_JOB_STALE_MINUTES = int(os.environ.get("CHECK_PENDING_JOB_STALE_MINUTES", 30))
+
+# In-process periodic scheduler (dashboard/scheduler.py). Every web worker runs
+# it; a DB lease, renewed while a command runs, makes sure each command runs
+# once per interval and never twice at the same time.
+SCHEDULER_ENABLED = os.environ.get("SCHEDULER_ENABLED", "False").lower() == "true"
+SCHEDULER_TICK = int(os.environ.get("SCHEDULER_TICK", 60))  # seconds between lease checks
+SCHEDULER_LEASE = int(os.environ.get("SCHEDULER_LEASE", 300))  # seconds; renewed while a task runs
+SCHEDULED_COMMANDS = {
+    "check_pending": {
+        "interval": int(os.environ.get("CHECK_PENDING_INTERVAL", 3600)),
+        "options": {"incremental": True, "days": 7},
+    },
+    # Safety net for reports written outside InspectionReportView (admin, imports)
+    "rebuild_due_columns": {
+        "interval": int(os.environ.get("REBUILD_DUE_COLUMNS_INTERVAL", 86400)),
+    },
+    "generate_due_occurrences": {
+        "interval": int(os.environ.get("DUE_OCCURRENCES_INTERVAL", 86400)),
+        "options": {"horizon": 60},
+    },
+    # Reads DueOccurrence, so it runs after generate_due_occurrences
+    "rollup_compliance": {
+        "interval": int(os.environ.get("COMPLIANCE_ROLLUP_INTERVAL", 86400)),
+    },
+    "prune_tombstones": {
+        "interval": int(os.environ.get("PRUNE_TOMBSTONES_INTERVAL", 86400)),
+    },
+    "prune_idempotency_keys": {
+        "interval": int(os.environ.get("PRUNE_IDEMPOTENCY_KEYS_INTERVAL", 3600)),
+    },
+}
+
 
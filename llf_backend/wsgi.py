@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "llf_backend.settings")
 
 application = get_wsgi_application()
+
+# Periodic maintenance (pending detection etc.), see dashboard/scheduler.py
+from dashboard import scheduler  # noqa: E402
+
+scheduler.start()